@@ -0,0 +1,136 @@
+"""Read-only JSON API (``/api/v1``) over the data the HTML views render.
+
+Responses carry the same dicts as the pages, support ``?fields=a,b`` to
+trim top-level keys (of each item, for listings), keyset pagination through
+``?cursor=`` and the same ETag/Last-Modified validators as the HTML routes.
+Serialization uses orjson (a declared dependency); the stdlib json module
+is only a fallback for environments where it cannot be installed.
+"""
+
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, abort, request, url_for
+
+import conditional
+from routing import read_only
+from app import (
+    artist_details,
+    artists_page,
+    show_date_range,
+    shows_page,
+    venue_details,
+    venues_page,
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, separators=(",", ":"))
+
+
+def _fields():
+    fields = request.args.get("fields")
+    if not fields:
+        return None
+    return {field.strip() for field in fields.split(",") if field.strip()}
+
+
+def _select(item, fields):
+    if fields is None:
+        return item
+    return {key: value for key, value in item.items() if key in fields}
+
+
+def _json(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype="application/json")
+
+
+def _listing(items, page):
+    fields = _fields()
+    payload = {"data": [_select(item, fields) for item in items]}
+    args = request.args.to_dict()
+    payload["next"] = (
+        url_for(request.endpoint, **dict(args, cursor=page.next_cursor))
+        if page.has_next
+        else None
+    )
+    payload["prev"] = (
+        url_for(request.endpoint, **dict(args, cursor=page.prev_cursor))
+        if page.has_prev
+        else None
+    )
+    return _json(payload)
+
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def api_error(error):
+    return _json({"error": error.name}, status=error.code)
+
+
+@api.route("/venues")
+@read_only
+@conditional.conditional(conditional.venues_listing)
+def venues():
+    try:
+        page = venues_page(request.args.get("cursor"))
+    except ValueError:
+        abort(400)
+    return _listing([dict(row._mapping) for row in page.items], page)
+
+
+@api.route("/venues/<int:venue_id>")
+@read_only
+@conditional.conditional(conditional.venue_detail)
+def venue(venue_id):
+    data = venue_details(venue_id)
+    if data is None:
+        abort(404)
+    return _json(_select(data, _fields()))
+
+
+@api.route("/artists")
+@read_only
+@conditional.conditional(conditional.artists_listing)
+def artists():
+    try:
+        page = artists_page(request.args.get("cursor"))
+    except ValueError:
+        abort(400)
+    return _listing([dict(row._mapping) for row in page.items], page)
+
+
+@api.route("/artists/<int:artist_id>")
+@read_only
+@conditional.conditional(conditional.artist_detail)
+def artist(artist_id):
+    data = artist_details(artist_id)
+    if data is None:
+        abort(404)
+    return _json(_select(data, _fields()))
+
+
+@api.route("/shows")
+@read_only
+@conditional.conditional(conditional.shows_listing)
+def shows():
+    try:
+        data, page = shows_page(request.args.get("cursor"), *show_date_range(request.args))
+    except ValueError:
+        abort(400)
+    return _listing(data, page)
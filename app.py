@@ -3,7 +3,7 @@
 # ----------------------------------------------------------------------------#
 
 import dateutil.parser
-import babel
+import babel.dates
 from flask import (
     Flask,
     render_template,
@@ -12,15 +12,33 @@ from flask import (
     redirect,
     url_for,
     abort,
+    Response,
+    jsonify,
+    stream_with_context,
 )
 from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
+from markupsafe import Markup
 from logging import Formatter, FileHandler
 from forms import *
+from pagination import paginate
+import db_pool
+import routing
+import request_timing
+import metrics
+import profiling
+import template_cache
+from routing import RoutingSQLAlchemy, read_only
 from flask_migrate import Migrate
+from sqlalchemy import select, text, union_all
+from sqlalchemy.orm import joinedload
+from datetime import datetime, timedelta
 from operator import itemgetter
+from functools import lru_cache
+from itertools import groupby
+import os
 import re
 import logging
+import click
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +49,14 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 moment = Moment(app)
 app.config.from_object("config")
-db = SQLAlchemy(app)
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = db_pool.engine_options(app.config)
+db = RoutingSQLAlchemy(app)
+db_pool.configure_engine(db.get_engine(app), app.config)
+request_timing.init_app(app)
+metrics.init_app(app)
+profiling.init_app(app)
+template_cache.init_app(app)
+routing.init_app(app, db)
 migrate = Migrate(app, db)
 
 # ----------------------------------------------------------------------------#
@@ -39,30 +64,376 @@ migrate = Migrate(app, db)
 # ----------------------------------------------------------------------------#
 
 from models import *
+import search
+from genres import resolve_genres
+from counters import record_new_show, rollover_shows
+from archive import all_shows, archive_horizon, archive_shows
+import conditional
+import bulk_import
+import bulk_export
+from page_cache import detail_cache, invalidate_artist, invalidate_venue
 
 # ----------------------------------------------------------------------------#
 # Filters.
 # ----------------------------------------------------------------------------#
 
 
-def format_datetime(value, _format="medium"):
-    date = dateutil.parser.parse(value)
-    if _format == "full":
-        _format = "EEEE MMMM, d, y 'at' h:mma"
-    elif _format == "medium":
-        _format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, _format, locale="en")
+DATETIME_FORMATS = {
+    "full": "EEEE MMMM, d, y 'at' h:mma",
+    "medium": "EE MM, dd, y h:mma",
+}
+
+
+@lru_cache(maxsize=None)
+def _datetime_pattern(_format, locale):
+    return (
+        babel.dates.parse_pattern(DATETIME_FORMATS.get(_format, _format)),
+        babel.Locale.parse(locale),
+    )
+
+
+@lru_cache(maxsize=4096)
+def _format_datetime(value, _format, locale):
+    pattern, locale = _datetime_pattern(_format, locale)
+    return pattern.apply(value, locale)
+
+
+def format_datetime(value, _format="medium", locale="en"):
+    """Formats a datetime (or a string holding one) with a cached babel pattern."""
+
+    if not isinstance(value, datetime):
+        value = dateutil.parser.parse(value)
+    return _format_datetime(value, _format, locale)
 
 
 app.jinja_env.filters["datetime"] = format_datetime
 
 
+@app.before_first_request
+def build_search_indexes():
+    if search.memory_index_enabled():
+        search.build_indexes()
+
+
+def split_shows(shows, now):
+    """Splits start_time-ordered show rows into (past, upcoming) in one pass.
+
+    A show starting exactly at `now` counts as past.
+    """
+
+    split = len(shows)
+    for i, show in enumerate(shows):
+        if show.start_time > now:
+            split = i
+            break
+    return shows[:split], shows[split:]
+
+
+# ----------------------------------------------------------------------------#
+# Queries.
+# ----------------------------------------------------------------------------#
+# Shared by the HTML views, the JSON API and the async read path (asgi.py):
+# the *_query() functions build statements without running them, the
+# *_data() functions shape fetched rows. The listing functions raise
+# ValueError for a malformed pagination cursor.
+
+VENUE_LISTING_KEYS = [Venue.state, Venue.city, Venue.name, Venue.id]
+ARTIST_LISTING_KEYS = [Artist.name, Artist.id]
+
+
+def venues_query():
+    return select(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        Venue.upcoming_shows_count.label("num_upcoming_shows"),
+    )
+
+
+def artists_query():
+    return select(Artist.id, Artist.name)
+
+
+def shows_query(start=None, end=None):
+    """Listing rows of the shows starting in [start, end), and the keys to
+    page them by; either bound may be None. A range reaching back past the
+    archive horizon also reads ShowArchive (archive.all_shows()). On
+    PostgreSQL a bounded range only scans the matching monthly partitions of
+    Show."""
+
+    shows = Show.__table__
+    if (start, end) != (None, None) and (start is None or start < archive_horizon()):
+        shows = all_shows()
+    query = (
+        select(
+            shows.c.id,
+            shows.c.start_time,
+            shows.c.venue_id,
+            Venue.name.label("venue_name"),
+            shows.c.artist_id,
+            Artist.name.label("artist_name"),
+            Artist.image_link.label("artist_image_link"),
+        )
+        .join(Venue, shows.c.venue_id == Venue.id)
+        .join(Artist, shows.c.artist_id == Artist.id)
+    )
+    if start is not None:
+        query = query.where(shows.c.start_time >= start)
+    if end is not None:
+        query = query.where(shows.c.start_time < end)
+    return query, [shows.c.start_time, shows.c.id]
+
+
+def show_date_range(args):
+    """Parses the ``from`` and ``to`` dates (YYYY-MM-DD, both inclusive) of a
+    /shows request into shows_query() bounds. Raises ValueError when invalid."""
+
+    start = end = None
+    if args.get("from"):
+        start = datetime.strptime(args["from"], "%Y-%m-%d")
+    if args.get("to"):
+        end = datetime.strptime(args["to"], "%Y-%m-%d") + timedelta(days=1)
+    if start is not None and end is not None and end <= start:
+        raise ValueError("to is before from")
+    return start, end
+
+
+def _owner_shows(owner, owner_id, now):
+    """The shows of the venue or artist whose `owner` column ("venue_id" or
+    "artist_id") is `owner_id`: the past ones from Show and ShowArchive, the
+    upcoming ones (after `now`, never archived) from Show alone. Bounding
+    each half by start_time lets PostgreSQL skip the Show partitions that
+    half cannot match."""
+
+    past = all_shows()
+    return union_all(
+        select(past.c.id, past.c.start_time, past.c.artist_id, past.c.venue_id).where(
+            past.c[owner] == owner_id, past.c.start_time <= now
+        ),
+        select(Show.id, Show.start_time, Show.artist_id, Show.venue_id).where(
+            Show.__table__.c[owner] == owner_id, Show.start_time > now
+        ),
+    ).subquery("owner_shows")
+
+
+def venue_shows_query(venue_id, now):
+    """A venue's shows, archived ones included, in start_time order."""
+
+    shows = _owner_shows("venue_id", venue_id, now)
+    return (
+        select(shows.c.start_time, Artist.id, Artist.name, Artist.image_link)
+        .join(Artist, shows.c.artist_id == Artist.id)
+        .order_by(shows.c.start_time, shows.c.id)
+    )
+
+
+def artist_shows_query(artist_id, now):
+    """An artist's shows, archived ones included, in start_time order."""
+
+    shows = _owner_shows("artist_id", artist_id, now)
+    return (
+        select(shows.c.start_time, Venue.id, Venue.name, Venue.image_link)
+        .join(Venue, shows.c.venue_id == Venue.id)
+        .order_by(shows.c.start_time, shows.c.id)
+    )
+
+
+def genre_names_query(genre_table, owner_fk, owner_id):
+    return (
+        select(Genre.name)
+        .join(genre_table, genre_table.c.genre_id == Genre.id)
+        .where(owner_fk == owner_id)
+        .order_by(Genre.name)
+    )
+
+
+def venues_page(cursor=None):
+    """Returns a Page of venue rows ordered by state, city and name."""
+
+    return paginate(
+        venues_query(),
+        VENUE_LISTING_KEYS,
+        cursor=cursor,
+        per_page=app.config["VENUES_PER_PAGE"],
+        execute=db.session.execute,
+    )
+
+
+def artists_page(cursor=None):
+    """Returns a Page of artist rows ordered by name."""
+
+    return paginate(
+        artists_query(),
+        ARTIST_LISTING_KEYS,
+        cursor=cursor,
+        per_page=app.config["ARTISTS_PER_PAGE"],
+        execute=db.session.execute,
+    )
+
+
+def shows_data(rows):
+    return [
+        {
+            "venue_id": show.venue_id,
+            "venue_name": show.venue_name,
+            "artist_id": show.artist_id,
+            "artist_name": show.artist_name,
+            "artist_image_link": show.artist_image_link,
+            "start_time": show.start_time,
+        }
+        for show in rows
+    ]
+
+
+def shows_page(cursor=None, start=None, end=None):
+    """Returns (show dicts, Page) of the shows starting in [start, end),
+    ordered by start time."""
+
+    query, keys = shows_query(start, end)
+    page = paginate(
+        query,
+        keys,
+        cursor=cursor,
+        per_page=app.config["SHOWS_PER_PAGE"],
+        execute=db.session.execute,
+    )
+    return shows_data(page.items), page
+
+
+def _format_phone(phone):
+    return phone[:3] + "-" + phone[3:6] + "-" + phone[6:]
+
+
+def venue_data(venue, genres, shows, now):
+    """Builds the show_venue page data from a venue (model or row), its genre
+    names and its venue_shows_query() rows."""
+
+    past, upcoming = split_shows(shows, now)
+
+    past_shows = [
+        {
+            "artist_id": i[1],
+            "artist_name": i[2],
+            "artist_image_link": i[3],
+            "start_time": i[0],
+        }
+        for i in past
+    ]
+    upcoming_shows = [
+        {
+            "artist_id": i[1],
+            "artist_name": i[2],
+            "artist_image_link": i[3],
+            "start_time": i[0],
+        }
+        for i in upcoming
+    ]
+
+    return {
+        "id": venue.id,
+        "name": venue.name,
+        "genres": genres,
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "phone": _format_phone(venue.phone),
+        "website": venue.website,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "seeking_description": venue.seeking_description,
+        "image_link": venue.image_link,
+        "past_shows": past_shows,
+        "past_shows_count": len(past),
+        "upcoming_shows": upcoming_shows,
+        "upcoming_shows_count": len(upcoming),
+    }
+
+
+def artist_data(artist, genres, shows, now):
+    """Builds the show_artist page data from an artist (model or row), its
+    genre names and its artist_shows_query() rows."""
+
+    past, upcoming = split_shows(shows, now)
+
+    past_shows = [
+        {
+            "venue_id": i[1],
+            "venue_name": i[2],
+            "venue_image_link": i[3],
+            "start_time": i[0],
+        }
+        for i in past
+    ]
+    upcoming_shows = [
+        {
+            "venue_id": i[1],
+            "venue_name": i[2],
+            "venue_image_link": i[3],
+            "start_time": i[0],
+        }
+        for i in upcoming
+    ]
+
+    return {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": genres,
+        "city": artist.city,
+        "state": artist.state,
+        "phone": _format_phone(artist.phone),
+        "website": artist.website,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description,
+        "image_link": artist.image_link,
+        "past_shows": past_shows,
+        "past_shows_count": len(past),
+        "upcoming_shows": upcoming_shows,
+        "upcoming_shows_count": len(upcoming),
+    }
+
+
+def venue_details(venue_id):
+    """Builds the show_venue page data, or returns None for an unknown id."""
+
+    venue = (
+        Venue.query.options(joinedload(Venue.genres))
+        .filter(Venue.id == venue_id)
+        .one_or_none()
+    )
+    if not venue:
+        return None
+    genres = [genre.name for genre in venue.genres]
+    now = datetime.now()
+    shows = db.session.execute(venue_shows_query(venue_id, now)).all()
+    return venue_data(venue, genres, shows, now)
+
+
+def artist_details(artist_id):
+    """Builds the show_artist page data, or returns None for an unknown id."""
+
+    artist = (
+        Artist.query.options(joinedload(Artist.genres))
+        .filter(Artist.id == artist_id)
+        .one_or_none()
+    )
+    if not artist:
+        return None
+    genres = [genre.name for genre in artist.genres]
+    now = datetime.now()
+    shows = db.session.execute(artist_shows_query(artist_id, now)).all()
+    return artist_data(artist, genres, shows, now)
+
+
 # ----------------------------------------------------------------------------#
 # Controllers.
 # ----------------------------------------------------------------------------#
 
 
 @app.route("/")
+@read_only
+@conditional.conditional(conditional.static_page)
 def index():
     return render_template("pages/home.html")
 
@@ -72,149 +443,97 @@ def index():
 
 
 @app.route("/venues")
+@read_only
+@conditional.conditional(conditional.venues_listing)
 def venues():
     """Lists all venues in record."""
 
-    all_venues = Venue.query.all()
-
-    data = []
-
-    cities_states = set()
-    for venue in all_venues:
-        cities_states.add((venue.city, venue.state))
-
-    cities_states = list(cities_states)
-    cities_states.sort(key=itemgetter(1, 0))
-
-    now = datetime.now()
+    try:
+        page = venues_page(request.args.get("cursor"))
+    except ValueError:
+        abort(400)
+    return render_venues(page)
 
-    for loc in cities_states:
-        venues_list = []
-        for venue in all_venues:
-            if (venue.city == loc[0]) and (venue.state == loc[1]):
 
-                venue_shows = Show.query.filter_by(venue_id=venue.id).all()
-                num_upcoming = 0
-                for show in venue_shows:
-                    if show.start_time > now:
-                        num_upcoming += 1
+def render_venues(page):
+    """Renders a Page of venues_query() rows grouped by city and state."""
 
-                venues_list.append(
+    data = []
+    for (city, state), area_rows in groupby(page.items, key=itemgetter(2, 3)):
+        data.append(
+            {
+                "city": city,
+                "state": state,
+                "venues": [
                     {
-                        "id": venue.id,
-                        "name": venue.name,
-                        "num_upcoming_shows": num_upcoming,
+                        "id": row.id,
+                        "name": row.name,
+                        "num_upcoming_shows": row.num_upcoming_shows,
                     }
-                )
-
-        data.append({"city": loc[0], "state": loc[1], "venues": venues_list})
-    return render_template("pages/venues.html", areas=data)
+                    for row in area_rows
+                ],
+            }
+        )
+    return render_template("pages/venues.html", areas=data, page=page)
 
 
 @app.route("/venues/search", methods=["POST"])
+@read_only
 def search_venues():
     """Retrieves venue records based on a substring as venue name."""
 
     search_term = request.form.get("search_term", "").strip()
+    rows, total = search.find_venues(search_term)
+    return render_search("pages/search_venues.html", rows, total, search_term)
 
-    all_venues = Venue.query.filter(
-        Venue.name.ilike(
-            "%" + search_term + "%")).all()
-    venue_list = []
-    now = datetime.now()
-    for venue in all_venues:
-        venue_shows = Show.query.filter_by(venue_id=venue.id).all()
-        num_upcoming = 0
-        for show in venue_shows:
-            if show.start_time > now:
-                num_upcoming += 1
-
-        venue_list.append({"id": venue.id, "name": venue.name,
-                           "num_upcoming_shows": num_upcoming})
 
-    response = {"count": len(all_venues), "data": venue_list}
-
-    return render_template(
-        "pages/search_venues.html", results=response, search_term=search_term
-    )
+def render_search(template, rows, total, search_term):
+    results = {
+        "count": total,
+        "data": [
+            {"id": row.id, "name": row.name, "num_upcoming_shows": row.num_upcoming_shows}
+            for row in rows
+        ],
+    }
+    return render_template(template, results=results, search_term=search_term)
 
 
 @app.route("/venues/<int:venue_id>")
+@read_only
+@conditional.conditional(conditional.venue_detail)
 def show_venue(venue_id):
     """Shows detailed info of a particular venue using it's id."""
 
-    venue = Venue.query.get(venue_id)
-    if not venue:
-        return redirect(url_for("index"))
-    else:
-        genres = [genre.name for genre in venue.genres]
-
-        past_shows = []
-        upcoming_shows = []
-        now = datetime.now()
-
-        past = (
-            db.session.query(Show) .filter(
-                Show.venue_id == venue_id) .filter(
-                Show.start_time < now) .join(
-                Artist,
-                Show.artist_id == Artist.id) .add_columns(
-                    Artist.id,
-                    Artist.name,
-                    Artist.image_link,
-                Show.start_time) .all())
-        for i in past:
-            past_shows.append(
-                {
-                    "artist_id": i[1],
-                    "artist_name": i[2],
-                    "artist_image_link": i[3],
-                    "start_time": str(i[4]),
-                }
-            )
-        past_shows_count = len(past)
-
-        upcoming = (
-            db.session.query(Show) .filter(
-                Show.venue_id == venue_id) .filter(
-                Show.start_time > now) .join(
-                Artist,
-                Show.artist_id == Artist.id) .add_columns(
-                    Artist.id,
-                    Artist.name,
-                    Artist.image_link,
-                Show.start_time) .all())
-        for i in upcoming:
-            upcoming_shows.append(
-                {
-                    "artist_id": i[1],
-                    "artist_name": i[2],
-                    "artist_image_link": i[3],
-                    "start_time": str(i[4]),
-                }
-            )
-        upcoming_shows_count = len(upcoming)
-
-        data = {
-            "id": venue_id,
-            "name": venue.name,
-            "genres": genres,
-            "address": venue.address,
-            "city": venue.city,
-            "state": venue.state,
-            "phone": (venue.phone[:3] + "-" + venue.phone[3:6] + "-" + venue.phone[6:]),
-            "website": venue.website,
-            "facebook_link": venue.facebook_link,
-            "seeking_talent": venue.seeking_talent,
-            "seeking_description": venue.seeking_description,
-            "image_link": venue.image_link,
-            "past_shows": past_shows,
-            "past_shows_count": past_shows_count,
-            "upcoming_shows": upcoming_shows,
-            "upcoming_shows_count": upcoming_shows_count,
-        }
-
-    return render_template("pages/show_venue.html", venue=data)
+    key = ("venue", venue_id)
+    stamp = conditional.detail_stamp(*key)
+    version = detail_cache.version(key)
+    detail = detail_cache.get(key, stamp)
+    if detail is None:
+        data = venue_details(venue_id)
+        if data is None:
+            return redirect(url_for("index"))
+        detail = cache_venue_detail(data, version, stamp)
+    return render_venue(detail)
+
+
+def render_venue(detail):
+    return render_template("pages/show_venue.html", detail=Markup(detail))
+
+
+def cache_venue_detail(data, version, stamp):
+    """Renders the venue detail fragment and caches it as of `version` and
+    the database `stamp` it was read after."""
+
+    upcoming = data["upcoming_shows"]
+    detail = render_template("fragments/venue_detail.html", venue=data)
+    detail_cache.set(
+        ("venue", data["id"]),
+        version,
+        detail,
+        expires_at=upcoming[0]["start_time"] if upcoming else None,
+        stamp=stamp,
+    )
+    return detail
 
 
 #  Create Venue
@@ -261,18 +580,12 @@ def create_venue_submission():
             website=website,
             facebook_link=facebook_link,
         )
-        for genre in genres:
-            fetch_genre = Genre.query.filter_by(name=genre).one_or_none()
-            if fetch_genre:
-                new_venue.genres.append(fetch_genre)
-
-            else:
-                new_genre = Genre(name=genre)
-                db.session.add(new_genre)
-                new_venue.genres.append(new_genre)
+        new_venue.genres = resolve_genres(genres)
 
         db.session.add(new_venue)
         db.session.commit()
+        if search.memory_index_enabled():
+            search.venue_names.add(new_venue.id, new_venue.name)
     except Exception as e:
         error_in_insert = True
         logger.error("Exception in create_venue_submission(): ")
@@ -357,18 +670,15 @@ def edit_venue_submission(venue_id):
         venue.website = website
         venue.facebook_link = facebook_link
 
-        venue.genres = []
-        for genre in genres:
-            fetch_genre = Genre.query.filter_by(name=genre).one_or_none()
-            if fetch_genre:
-                venue.genres.append(fetch_genre)
-
-            else:
-                new_genre = Genre(name=genre)
-                db.session.add(new_genre)
-                venue.genres.append(new_genre)
+        venue.genres = resolve_genres(genres)
+        # A genre-only edit writes just the association table; touch the row
+        # so the page's ETag (derived from updated_at) changes too.
+        venue.updated_at = datetime.utcnow()
 
         db.session.commit()
+        if search.memory_index_enabled():
+            search.venue_names.add(venue_id, name)
+        invalidate_venue(venue_id)
     except Exception as e:
         error_in_update = True
         logger.error("Exception in edit_venue_submission(): ")
@@ -392,126 +702,84 @@ def edit_venue_submission(venue_id):
 
 
 @app.route("/artists")
+@read_only
+@conditional.conditional(conditional.artists_listing)
 def artists():
     """Lists all artists in record."""
 
-    all_artists = Artist.query.order_by(Artist.name).all()
+    try:
+        page = artists_page(request.args.get("cursor"))
+    except ValueError:
+        abort(400)
+    return render_artists(page)
 
+
+def render_artists(page):
     data = []
-    for artist in all_artists:
+    for artist in page.items:
         data.append({"id": artist.id, "name": artist.name})
 
-    return render_template("pages/artists.html", artists=data)
+    return render_template("pages/artists.html", artists=data, page=page)
 
 
 @app.route("/artists/search", methods=["POST"])
+@read_only
 def search_artists():
     """Retrieves artist records based on a substring as artist name."""
 
     search_term = request.form.get("search_term", "").strip()
-
-    all_artists = Artist.query.filter(
-        Artist.name.ilike(
-            "%" + search_term + "%")).all()
-    artist_list = []
-    now = datetime.now()
-    for artist in all_artists:
-        artist_shows = Show.query.filter_by(artist_id=artist.id).all()
-        num_upcoming = 0
-        for show in artist_shows:
-            if show.start_time > now:
-                num_upcoming += 1
-
-        artist_list.append({"id": artist.id,
-                            "name": artist.name,
-                            "num_upcoming_shows": num_upcoming})
-
-    response = {"count": len(all_artists), "data": artist_list}
-
-    return render_template(
+    rows, total = search.find_artists(search_term)
+    return render_search(
         "pages/search_artists.html",
-        results=response,
-        search_term=request.form.get("search_term", ""),
+        rows,
+        total,
+        request.form.get("search_term", ""),
     )
 
 
 @app.route("/artists/<int:artist_id>")
+@read_only
+@conditional.conditional(conditional.artist_detail)
 def show_artist(artist_id):
     """Shows detailed info of a particular artist using it's id."""
 
-    artist = Artist.query.get(artist_id)
-    if not artist:
-        return redirect(url_for("index"))
-    else:
-        genres = [genre.name for genre in artist.genres]
-
-        past_shows = []
-        upcoming_shows = []
-        now = datetime.now()
-
-        past = (
-            db.session.query(Show) .filter(
-                Show.artist_id == artist_id) .filter(
-                Show.start_time < now) .join(
-                Venue,
-                Show.venue_id == Venue.id) .add_columns(
-                    Venue.id,
-                    Venue.name,
-                    Venue.image_link,
-                Show.start_time) .all())
-        for i in past:
-            past_shows.append(
-                {
-                    "venue_id": i[1],
-                    "venue_name": i[2],
-                    "venue_image_link": i[3],
-                    "start_time": str(i[4]),
-                }
-            )
-        past_shows_count = len(past)
-
-        upcoming = (
-            db.session.query(Show) .filter(
-                Show.artist_id == artist_id) .filter(
-                Show.start_time > now) .join(
-                Venue,
-                Show.venue_id == Venue.id) .add_columns(
-                    Venue.id,
-                    Venue.name,
-                    Venue.image_link,
-                Show.start_time) .all())
-        for i in upcoming:
-            upcoming_shows.append(
-                {
-                    "venue_id": i[1],
-                    "venue_name": i[2],
-                    "venue_image_link": i[3],
-                    "start_time": str(i[4]),
-                }
-            )
-        upcoming_shows_count = len(upcoming)
-
-        data = {
-            "id": artist_id,
-            "name": artist.name,
-            "genres": genres,
-            "city": artist.city,
-            "state": artist.state,
-            "phone": (
-                artist.phone[:3] + "-" + artist.phone[3:6] + "-" + artist.phone[6:]
-            ),
-            "website": artist.website,
-            "facebook_link": artist.facebook_link,
-            "seeking_venue": artist.seeking_venue,
-            "seeking_description": artist.seeking_description,
-            "image_link": artist.image_link,
-            "past_shows": past_shows,
-            "past_shows_count": past_shows_count,
-            "upcoming_shows": upcoming_shows,
-            "upcoming_shows_count": upcoming_shows_count,
-        }
+    key = ("artist", artist_id)
+    stamp = conditional.detail_stamp(*key)
+    version = detail_cache.version(key)
+    detail = detail_cache.get(key, stamp)
+    if detail is None:
+        data = artist_details(artist_id)
+        if data is None:
+            return redirect(url_for("index"))
+        detail = cache_artist_detail(data, version, stamp)
+    return render_artist(detail)
+
+
+def cache_artist_detail(data, version, stamp):
+    """Renders the artist detail fragment and caches it, with the artist's
+    name for the page title, as of `version` and the database `stamp` it was
+    read after."""
+
+    upcoming = data["upcoming_shows"]
+    detail = (
+        data["name"],
+        render_template("fragments/artist_detail.html", artist=data),
+    )
+    detail_cache.set(
+        ("artist", data["id"]),
+        version,
+        detail,
+        expires_at=upcoming[0]["start_time"] if upcoming else None,
+        stamp=stamp,
+    )
+    return detail
 
-    return render_template("pages/show_artist.html", artist=data)
+
+def render_artist(detail):
+    name, html = detail
+    return render_template(
+        "pages/show_artist.html", artist_name=name, detail=Markup(html)
+    )
 
 
 #  Update
@@ -577,19 +845,15 @@ def edit_artist_submission(artist_id):
         artist.image_link = image_link
         artist.website = website
         artist.facebook_link = facebook_link
-        artist.genres = []
-
-        for genre in genres:
-            fetch_genre = Genre.query.filter_by(name=genre).one_or_none()
-            if fetch_genre:
-                artist.genres.append(fetch_genre)
-
-            else:
-                new_genre = Genre(name=genre)
-                db.session.add(new_genre)
-                artist.genres.append(new_genre)
+        artist.genres = resolve_genres(genres)
+        # A genre-only edit writes just the association table; touch the row
+        # so the page's ETag (derived from updated_at) changes too.
+        artist.updated_at = datetime.utcnow()
 
         db.session.commit()
+        if search.memory_index_enabled():
+            search.artist_names.add(artist_id, name)
+        invalidate_artist(artist_id)
 
     except Exception as e:
         error_in_update = True
@@ -652,18 +916,12 @@ def create_artist_submission():
             facebook_link=facebook_link,
         )
 
-        for genre in genres:
-            fetch_genre = Genre.query.filter_by(name=genre).one_or_none()
-            if fetch_genre:
-                new_artist.genres.append(fetch_genre)
-
-            else:
-                new_genre = Genre(name=genre)
-                db.session.add(new_genre)
-                new_artist.genres.append(new_genre)
+        new_artist.genres = resolve_genres(genres)
 
         db.session.add(new_artist)
         db.session.commit()
+        if search.memory_index_enabled():
+            search.artist_names.add(new_artist.id, new_artist.name)
 
     except Exception as e:
         error_in_insert = True
@@ -687,26 +945,21 @@ def create_artist_submission():
 
 
 @app.route("/shows")
+@read_only
+@conditional.conditional(conditional.shows_listing)
 def shows():
-    """Lists all shows in record."""
+    """Lists all shows in record, or those between the ``from`` and ``to``
+    dates."""
 
-    data = []
-    all_shows = Show.query.all()
+    try:
+        data, page = shows_page(request.args.get("cursor"), *show_date_range(request.args))
+    except ValueError:
+        abort(400)
+    return render_shows(data, page)
 
-    for show in all_shows:
-        venue = Venue.query.get(show.venue_id)
-        artist = Artist.query.get(show.artist_id)
-        data.append(
-            {
-                "venue_id": show.venue_id,
-                "venue_name": venue.name,
-                "artist_id": show.artist_id,
-                "artist_name": artist.name,
-                "artist_image_link": artist.image_link,
-                "start_time": format_datetime(str(show.start_time)),
-            }
-        )
-    return render_template("pages/shows.html", shows=data)
+
+def render_shows(data, page):
+    return render_template("pages/shows.html", shows=data, page=page)
 
 
 @app.route("/shows/create")
@@ -726,7 +979,7 @@ def create_show_submission():
     try:
         artist_id = request.form.get("artist_id")
         venue_id = request.form.get("venue_id")
-        start_time = request.form.get("start_time")
+        start_time = dateutil.parser.parse(request.form.get("start_time"))
 
         found_artist = Artist.query.get(artist_id)
         if found_artist is None:
@@ -740,8 +993,10 @@ def create_show_submission():
             new_show = Show(
                 start_time=start_time, artist_id=artist_id, venue_id=venue_id
             )
+            record_new_show(new_show, found_venue, found_artist)
             db.session.add(new_show)
             db.session.commit()
+            detail_cache.invalidate(("venue", int(venue_id)), ("artist", int(artist_id)))
 
     except Exception as e:
         logger.error("Exception in create_show_submission()")
@@ -762,6 +1017,50 @@ def create_show_submission():
     return render_template("pages/home.html")
 
 
+#  Export
+#  ----------------------------------------------------------------
+
+
+@app.route("/export/<kind>.<fmt>")
+@read_only
+def export(kind, fmt):
+    """Streams a full table dump; resume with ?after_id=<last id received>."""
+
+    if kind not in bulk_export.KINDS or fmt not in bulk_export.MIMETYPES:
+        abort(404)
+    after_id = request.args.get("after_id", 0, type=int)
+
+    return Response(
+        stream_with_context(bulk_export.stream(kind, fmt, after_id)),
+        mimetype=bulk_export.MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={kind}.{fmt}"},
+    )
+
+
+#  Health
+#  ----------------------------------------------------------------
+
+
+@app.route("/health")
+def health():
+    """Reports database reachability and connection pool usage."""
+
+    try:
+        db.session.execute(text("SELECT 1"))
+        healthy = True
+    except Exception as e:
+        healthy = False
+        logger.error("Exception in health()")
+        logger.error(e)
+
+    payload = {
+        "status": "ok" if healthy else "unavailable",
+        "pool": db_pool.pool_status(db.engine),
+        "replicas": app.extensions["replicas"].status(),
+    }
+    return jsonify(payload), 200 if healthy else 503
+
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template("errors/404.html"), 404
@@ -772,6 +1071,145 @@ def server_error(error):
     return render_template("errors/500.html"), 500
 
 
+# ----------------------------------------------------------------------------#
+# API.
+# ----------------------------------------------------------------------------#
+
+from api import api
+
+app.register_blueprint(api)
+
+# ----------------------------------------------------------------------------#
+# Commands.
+# ----------------------------------------------------------------------------#
+
+
+@app.cli.command("rollover-shows")
+def rollover_shows_command():
+    """Moves shows that have started from upcoming to past counters."""
+
+    moved = rollover_shows()
+    click.echo(f"Moved {moved} show(s) to past.")
+
+
+@app.cli.command("archive-shows")
+@click.option("--days", type=int, help="Archive shows that started more than this "
+              "many days ago; defaults to SHOW_ARCHIVE_AFTER_DAYS.")
+@click.option("--batch-size", type=int, help="Rows per transaction; defaults to "
+              "SHOW_ARCHIVE_BATCH_SIZE.")
+def archive_shows_command(days, batch_size):
+    """Moves past shows from Show to ShowArchive in batches."""
+
+    before = datetime.now() - timedelta(days=days) if days is not None else None
+    archived = archive_shows(before, batch_size, report=click.echo)
+    click.echo(f"Archived {archived} show(s).")
+
+
+@app.cli.command("create-partitions")
+@click.option("--months", type=int, help="Months ahead to cover; defaults to "
+              "SHOW_PARTITION_MONTHS_AHEAD.")
+def create_partitions_command(months):
+    """Creates the monthly Show partitions for the coming months."""
+
+    import partitions
+
+    if not partitions.is_partitioned():
+        click.echo("Show is not partitioned; nothing to do.")
+        return
+    created = partitions.ensure_partitions(months)
+    for name, moved in created:
+        click.echo(f"Created {name} ({moved} row(s) moved from {partitions.DEFAULT_PARTITION}).")
+    if not created:
+        click.echo("All partitions exist.")
+
+
+@app.cli.command("import")
+@click.argument("kind", type=click.Choice(sorted(bulk_import.KINDS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]),
+              help="Defaults to the file extension.")
+@click.option("--batch-size", default=5000, show_default=True)
+def import_command(kind, path, fmt, batch_size):
+    """Streams venues, artists or shows from a CSV/NDJSON file."""
+
+    loaded, rejected = bulk_import.import_file(
+        kind, path, fmt=fmt, batch_size=batch_size, report=click.echo
+    )
+    click.echo(f"Imported {loaded} {kind}, rejected {rejected}.")
+
+
+@app.cli.command("export")
+@click.argument("kind", type=click.Choice(sorted(bulk_export.KINDS)))
+@click.option("--format", "fmt", type=click.Choice(sorted(bulk_export.MIMETYPES)),
+              default="csv", show_default=True)
+@click.option("--after-id", default=0, help="Resume after this id.")
+@click.option("-o", "--output", type=click.File("w"), default="-")
+def export_command(kind, fmt, after_id, output):
+    """Streams venues, artists or shows as CSV/NDJSON."""
+
+    for chunk in bulk_export.stream(kind, fmt, after_id):
+        output.write(chunk)
+
+
+@app.cli.command("check-plans")
+@click.option("--save", "save_dir", type=click.Path(file_okay=False),
+              help="Write each route's EXPLAIN output to this directory.")
+def check_plans_command(save_dir):
+    """Fails if any route's queries plan a sequential scan on Show."""
+
+    import query_plans
+
+    failures = query_plans.check(save_dir=save_dir, report=click.echo)
+    for url, relation, statement in failures:
+        click.echo(f"FAIL {url}: {relation or statement}")
+        if relation:
+            click.echo(f"  {statement}")
+    if failures:
+        raise SystemExit(1)
+    click.echo("All query plans use indexes.")
+
+
+@app.cli.command("compile-templates")
+@click.option("--dir", "directory", default=lambda: app.config["TEMPLATE_CACHE_DIR"],
+              type=click.Path(file_okay=False), show_default="TEMPLATE_CACHE_DIR")
+def compile_templates_command(directory):
+    """Precompiles every template into the bytecode cache workers load."""
+
+    names = template_cache.compile_all(app, directory)
+    click.echo(f"Compiled {len(names)} template(s) into {directory}.")
+
+
+@app.cli.command("profile-token")
+def profile_token_command():
+    """Prints an X-Profile header value that profiles a request."""
+
+    click.echo(f"{profiling.HEADER}: {profiling.make_token(app)}")
+
+
+@app.cli.command("profile-report")
+@click.option("--dir", "directory", default=lambda: app.config["PROFILE_DIR"],
+              type=click.Path(exists=True, file_okay=False))
+@click.option("--endpoint", help="Only dumps of this endpoint, e.g. venues.")
+@click.option("--top", default=25, show_default=True)
+@click.option("-o", "--output", type=click.File("w"),
+              help="Write the merged collapsed stacks here for a flamegraph.")
+def profile_report_command(directory, endpoint, top, output):
+    """Aggregates profile dumps: top functions by sampled self time."""
+
+    import pstats
+
+    paths = profiling.dump_paths(directory, endpoint)
+    if not paths:
+        raise click.ClickException(f"No profile dumps in {directory}.")
+    click.echo(f"{len(paths)} profiled request(s)")
+    stats = pstats.Stats(*(f"{path}.pstats" for path in paths))
+    stats.sort_stats("tottime").print_stats(top)
+    if output:
+        stacks = profiling.read_collapsed(f"{path}.collapsed" for path in paths)
+        for stack, count in sorted(stacks.items()):
+            output.write(f"{stack} {count}\n")
+
+
 if not app.debug:
     file_handler = FileHandler("error.log")
     file_handler.setFormatter(Formatter(
@@ -781,6 +1219,11 @@ if not app.debug:
     app.logger.addHandler(file_handler)
     app.logger.info("errors")
 
+# Workers render the main pages once at startup instead of on their first
+# requests; the flask CLI (migrations, compile-templates, ...) skips it.
+if app.config["TEMPLATE_WARMUP"] and os.environ.get("FLASK_RUN_FROM_CLI") != "true":
+    template_cache.warm_up(app)
+
 # ----------------------------------------------------------------------------#
 # Launch.
 # ----------------------------------------------------------------------------#
@@ -0,0 +1,95 @@
+"""Archival of past shows out of the hot Show table.
+
+Only the "Past Shows" sections of the venue and artist pages need shows that
+ended long ago, yet they weigh on every index and scan of Show.
+archive_shows() moves shows that started more than SHOW_ARCHIVE_AFTER_DAYS
+ago into ShowArchive in batches (``flask archive-shows``, run from cron after
+``flask rollover-shows``). Readers that need every show, past ones included,
+go through all_shows(), which merges both tables.
+
+Archived shows are already in their venue's and artist's past counters, and
+their rows do not change, so archiving changes neither the detail pages nor
+their validators. The /shows listing and /api/v1/shows read only Show,
+unless asked for a date range reaching back past archive_horizon(): other
+archived shows drop out of them, and their validators count Show's rows so
+that the drop is seen.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, union_all
+
+from app import app, db
+from models import Show, ShowArchive
+
+COLUMNS = ["id", "start_time", "artist_id", "venue_id", "updated_at"]
+
+
+def all_shows():
+    """Hot and archived shows as one subquery with the COLUMNS columns.
+
+    Filters on the subquery's venue_id/artist_id are pushed down into both
+    halves, so each is read through its own (owner, start_time) index.
+    """
+
+    return union_all(
+        select(*(Show.__table__.c[column] for column in COLUMNS)),
+        select(*(ShowArchive.__table__.c[column] for column in COLUMNS)),
+    ).subquery("all_shows")
+
+
+def archive_horizon():
+    """Shows that started before this may have been moved to ShowArchive."""
+
+    return datetime.now() - timedelta(days=app.config["SHOW_ARCHIVE_AFTER_DAYS"])
+
+
+def archive_shows(before=None, batch_size=None, report=None):
+    """Moves shows that started before `before` (default: SHOW_ARCHIVE_AFTER_DAYS
+    ago) to ShowArchive, `batch_size` rows per transaction. Shows still counted
+    as upcoming are left for rollover_shows(). Returns the number moved.
+    """
+
+    if before is None:
+        before = archive_horizon()
+    batch_size = batch_size or app.config["SHOW_ARCHIVE_BATCH_SIZE"]
+
+    archived = 0
+    try:
+        while True:
+            # Oldest first; SKIP LOCKED lets a concurrent run take other rows.
+            ids = (
+                db.session.execute(
+                    select(Show.id)
+                    .where(Show.start_time < before, ~Show.counted_upcoming)
+                    .order_by(Show.start_time, Show.id)
+                    .limit(batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                .scalars()
+                .all()
+            )
+            if not ids:
+                break
+            db.session.execute(
+                insert(ShowArchive).from_select(
+                    COLUMNS,
+                    select(*(Show.__table__.c[column] for column in COLUMNS)).where(
+                        Show.id.in_(ids), Show.start_time < before
+                    ),
+                )
+            )
+            # start_time bounds both statements to the old partitions.
+            db.session.execute(
+                delete(Show).where(Show.id.in_(ids), Show.start_time < before)
+            )
+            db.session.commit()
+            archived += len(ids)
+            if report:
+                report(f"archived {archived} shows")
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.close()
+    return archived
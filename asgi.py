@@ -0,0 +1,350 @@
+"""ASGI entry point serving the read-only pages from an async database engine.
+
+GET /venues, /artists, /shows, /venues/<id>, /artists/<id> and POST
+/venues/search, /artists/search are handled by coroutines that run their
+queries on SQLAlchemy's async engine (asyncpg by default), so a worker keeps
+serving other requests while it waits on the database, and the independent
+queries of a detail page (entity, genres, shows) run concurrently on
+separate connections. Statements, row shaping and rendering are the ones
+app.py uses, and the Flask request hooks (sessions, Server-Timing, metrics,
+profiling) run as usual; the before-request hooks, which may block on a
+replica health check, run in a worker thread. Everything else, including
+every write, is passed to the Flask WSGI app unchanged, as are requests
+whose session holds flashed messages, so the messages are shown and consumed
+by the sync views.
+
+The async routes do not answer conditional requests with 304; ETags stay on
+the sync routes and the JSON API.
+
+    uvicorn asgi:application --workers 4
+
+Needs the asgi extra packages (asgiref, asyncpg, an ASGI server).
+"""
+
+import asyncio
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi
+from flask import abort, redirect, request, session, url_for
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from werkzeug.routing import Map, Rule
+from werkzeug.test import EnvironBuilder
+
+import search
+from app import (
+    ARTIST_LISTING_KEYS,
+    VENUE_LISTING_KEYS,
+    app,
+    artist_data,
+    artist_shows_query,
+    artists_query,
+    cache_artist_detail,
+    cache_venue_detail,
+    genre_names_query,
+    render_artist,
+    render_artists,
+    render_search,
+    render_shows,
+    render_venue,
+    render_venues,
+    show_date_range,
+    shows_data,
+    shows_query,
+    venue_data,
+    venue_shows_query,
+    venues_query,
+)
+import conditional  # after app, which imports it first
+from models import Artist, Venue, artist_genre, venue_genre
+from page_cache import detail_cache
+from pagination import page_of, seek
+
+
+def async_engine_options(config):
+    """Pool options for the async engine, mirroring db_pool.engine_options()."""
+
+    if not config["ASYNC_DATABASE_URL"].startswith("postgresql"):
+        return {}
+    options = {
+        "pool_size": config["ASYNC_DB_POOL_SIZE"],
+        "max_overflow": config["ASYNC_DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
+    timeout = config["DB_STATEMENT_TIMEOUT"]
+    if timeout and "+asyncpg" in config["ASYNC_DATABASE_URL"]:
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout)}}
+    return options
+
+
+engine = create_async_engine(app.config["ASYNC_DATABASE_URL"], **async_engine_options(app.config))
+
+
+async def fetch_all(statement):
+    async with engine.connect() as connection:
+        return (await connection.execute(statement)).all()
+
+
+async def fetch_one(statement):
+    async with engine.connect() as connection:
+        return (await connection.execute(statement)).one_or_none()
+
+
+async def fetch_page(query, keys, per_page):
+    try:
+        query, direction, values = seek(query, keys, request.args.get("cursor"), per_page)
+    except ValueError:
+        abort(400)
+    return page_of(await fetch_all(query), keys, direction, values, per_page)
+
+
+# ----------------------------------------------------------------------------#
+# Views.
+# ----------------------------------------------------------------------------#
+
+
+async def venues():
+    page = await fetch_page(
+        venues_query(), VENUE_LISTING_KEYS, app.config["VENUES_PER_PAGE"]
+    )
+    return render_venues(page)
+
+
+async def artists():
+    page = await fetch_page(
+        artists_query(), ARTIST_LISTING_KEYS, app.config["ARTISTS_PER_PAGE"]
+    )
+    return render_artists(page)
+
+
+async def shows():
+    try:
+        start, end = show_date_range(request.args)
+    except ValueError:
+        abort(400)
+    query, keys = shows_query(start, end)
+    page = await fetch_page(query, keys, app.config["SHOWS_PER_PAGE"])
+    return render_shows(shows_data(page.items), page)
+
+
+async def _search(kind, plan, template, search_term):
+    changes = search.changes(kind)
+    if changes is not None:
+        search.catch_up(kind, await fetch_all(changes))
+    plan = plan(request.form.get("search_term", "").strip())
+    rows = await fetch_all(plan.statement) if plan.statement is not None else []
+    rows, total = plan.results(rows)
+    return render_search(template, rows, total, search_term)
+
+
+async def search_venues():
+    return await _search(
+        "venues",
+        search.plan_venues,
+        "pages/search_venues.html",
+        request.form.get("search_term", "").strip(),
+    )
+
+
+async def search_artists():
+    return await _search(
+        "artists",
+        search.plan_artists,
+        "pages/search_artists.html",
+        request.form.get("search_term", ""),
+    )
+
+
+async def _details(model, genre_table, owner_fk, shows_statement, owner_id):
+    entity, genres, shows = await asyncio.gather(
+        fetch_one(select(model.__table__).where(model.id == owner_id)),
+        fetch_all(genre_names_query(genre_table, owner_fk, owner_id)),
+        fetch_all(shows_statement),
+    )
+    return entity, [genre.name for genre in genres], shows
+
+
+async def fetch_stamp(statement):
+    row = await fetch_one(statement)
+    return tuple(row) if row is not None else None
+
+
+async def show_venue(venue_id):
+    key = ("venue", venue_id)
+    stamp = await fetch_stamp(conditional.venue_stamp_query(venue_id))
+    version = detail_cache.version(key)
+    detail = detail_cache.get(key, stamp)
+    if detail is None:
+        now = datetime.now()
+        venue, genres, shows = await _details(
+            Venue,
+            venue_genre,
+            venue_genre.c.venue_id,
+            venue_shows_query(venue_id, now),
+            venue_id,
+        )
+        if venue is None:
+            return redirect(url_for("index"))
+        detail = cache_venue_detail(venue_data(venue, genres, shows, now), version, stamp)
+    return render_venue(detail)
+
+
+async def show_artist(artist_id):
+    key = ("artist", artist_id)
+    stamp = await fetch_stamp(conditional.artist_stamp_query(artist_id))
+    version = detail_cache.version(key)
+    detail = detail_cache.get(key, stamp)
+    if detail is None:
+        now = datetime.now()
+        artist, genres, shows = await _details(
+            Artist,
+            artist_genre,
+            artist_genre.c.artist_id,
+            artist_shows_query(artist_id, now),
+            artist_id,
+        )
+        if artist is None:
+            return redirect(url_for("index"))
+        detail = cache_artist_detail(artist_data(artist, genres, shows, now), version, stamp)
+    return render_artist(detail)
+
+
+ROUTES = Map(
+    [
+        Rule("/venues", endpoint=venues, methods=["GET"]),
+        Rule("/artists", endpoint=artists, methods=["GET"]),
+        Rule("/shows", endpoint=shows, methods=["GET"]),
+        Rule("/venues/<int:venue_id>", endpoint=show_venue, methods=["GET"]),
+        Rule("/artists/<int:artist_id>", endpoint=show_artist, methods=["GET"]),
+        Rule("/venues/search", endpoint=search_venues, methods=["POST"]),
+        Rule("/artists/search", endpoint=search_artists, methods=["POST"]),
+    ]
+)
+
+
+# ----------------------------------------------------------------------------#
+# ASGI.
+# ----------------------------------------------------------------------------#
+
+
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+def _replay(body, receive):
+    """A receive callable that yields the already-read `body` first."""
+
+    sent = False
+
+    async def replayed():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replayed
+
+
+def _environ(scope, body):
+    headers = [
+        (name.decode("latin-1"), value.decode("latin-1")) for name, value in scope["headers"]
+    ]
+    host = dict(headers).get("host", "localhost")
+    client = scope.get("client") or ("", 0)
+    return EnvironBuilder(
+        path=scope["path"],
+        base_url=f"{scope.get('scheme', 'http')}://{host}{scope.get('root_path', '')}",
+        query_string=scope["query_string"],
+        method=scope["method"],
+        headers=headers,
+        data=body,
+        environ_base={"REMOTE_ADDR": client[0], "REMOTE_PORT": str(client[1])},
+    ).get_environ()
+
+
+class AsyncReadApp:
+    def __init__(self, flask_app):
+        self.app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return await self.wsgi(scope, receive, send)
+
+        try:
+            view, args = ROUTES.bind("localhost").match(scope["path"], scope["method"])
+        except (NotFound, MethodNotAllowed):
+            return await self.wsgi(scope, receive, send)
+
+        body = await _read_body(receive)
+        response = await self._dispatch(view, args, _environ(scope, body))
+        if response is None:
+            return await self.wsgi(scope, _replay(body, receive), send)
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in response.headers.to_wsgi_list()
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": response.get_data()})
+
+    async def _dispatch(self, view, args, environ):
+        """Runs `view` inside a Flask request context, like full_dispatch_request()
+        does for sync views. Returns None to hand the request to the WSGI app."""
+
+        app = self.app
+        if not app.got_first_request:
+            # Normally done at lifespan startup already.
+            await sync_to_async(app.try_trigger_before_first_request_functions)()
+        ctx = app.request_context(environ)
+        error = None
+        try:
+            ctx.push()
+            if session.get("_flashes"):
+                return None
+            try:
+                # The hooks block (replica health checks), so they run off
+                # the event loop; the request context follows them there.
+                rv = await sync_to_async(app.preprocess_request)()
+                if rv is None:
+                    rv = await view(**args)
+            except Exception as e:
+                rv = app.handle_user_exception(e)
+            return app.finalize_request(rv)
+        except Exception as e:
+            error = e
+            return app.handle_exception(e)
+        finally:
+            ctx.pop(error)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Builds the in-memory search indexes before the first request.
+                await sync_to_async(self.app.try_trigger_before_first_request_functions)()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+application = AsyncReadApp(app)
@@ -0,0 +1,132 @@
+"""Throughput of a running server under many concurrent keep-alive connections.
+
+Opens --connections HTTP/1.1 connections to --url and has each request the
+given paths round-robin for --duration seconds, then reports requests per
+second, latency percentiles and errors. Start the two servers to compare
+against the same local PostgreSQL (seeded with benchmarks/seed.py), e.g.
+
+    gunicorn -w 4 -b :8000 app:app
+    uvicorn --workers 4 --port 8001 asgi:application
+
+    python benchmarks/bench_concurrency.py --url http://127.0.0.1:8000 --connections 500
+    python benchmarks/bench_concurrency.py --url http://127.0.0.1:8001 --connections 500
+
+Every connection counts against the server's accept backlog and file
+descriptor limit; raise ``ulimit -n`` above the connection count first.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ["/venues", "/artists", "/shows", "/venues/1", "/artists/1"]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers.get("connection", "").lower() != "close"
+
+
+async def client(host, port, paths, deadline, offset, results):
+    reader = writer = None
+    i = offset
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            started = time.perf_counter()
+            writer.write(
+                f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n".encode("latin-1")
+            )
+            await writer.drain()
+            status, keep_alive = await _read_response(reader)
+            results["latencies"].append(time.perf_counter() - started)
+            results["statuses"][status] = results["statuses"].get(status, 0) + 1
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            results["errors"] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+
+async def run(url, paths, connections, duration):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    results = {"latencies": [], "statuses": {}, "errors": 0}
+    started = time.monotonic()
+    deadline = started + duration
+    await asyncio.gather(
+        *(client(host, port, paths, deadline, n, results) for n in range(connections))
+    )
+    elapsed = time.monotonic() - started
+    latencies = results["latencies"]
+    return {
+        "url": url,
+        "paths": paths,
+        "connections": connections,
+        "duration_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "statuses": {str(k): v for k, v in sorted(results["statuses"].items())},
+        "errors": results["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--connections", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--output", help="also write the result as JSON here")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.paths, args.connections, args.duration))
+    for key, value in result.items():
+        print(f"{key:<16}{value}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Micro-benchmark of the `datetime` template filter.
+
+Compares babel.dates.format_datetime on a re-parsed string (the previous
+filter) with app.format_datetime on a datetime, for a /shows-like mix of
+mostly repeated timestamps:
+
+    python benchmarks/bench_format_datetime.py [--shows 1000] [--distinct 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import babel.dates  # noqa: E402
+import dateutil.parser  # noqa: E402
+
+from app import DATETIME_FORMATS, format_datetime  # noqa: E402
+
+
+def reparse_format(value, _format="full"):
+    date = dateutil.parser.parse(value)
+    return babel.dates.format_datetime(date, DATETIME_FORMATS[_format], locale="en")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shows", type=int, default=1000)
+    parser.add_argument("--distinct", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    base = datetime(2026, 1, 1, 20, 0)
+    stamps = [base + timedelta(hours=7 * i) for i in range(args.distinct)]
+    values = [random.choice(stamps) for _ in range(args.shows)]
+    strings = [str(value) for value in values]
+
+    assert [format_datetime(v, "full") for v in values] == [
+        reparse_format(v) for v in strings
+    ]
+
+    for label, fn in (
+        ("parse + babel.format_datetime", lambda: [reparse_format(v) for v in strings]),
+        ("format_datetime(datetime)", lambda: [format_datetime(v, "full") for v in values]),
+    ):
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{label:<32}{best * 1000:>10.2f} ms per {args.shows} shows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""Per-route latency benchmark over every read route of the app.
+
+Each GET route in app.url_map (plus the two search POSTs) is requested
+--requests times after --warmup untimed requests, through the Flask test
+client or, with --server, over HTTP to an in-process WSGI server. For every
+route it reports p50/p95/p99 latency, SQL statements per request and the
+process RSS afterwards, and writes everything to a JSON file so runs can be
+compared across commits:
+
+    python benchmarks/bench_routes.py [--requests 200] [--server] [--cold]
+    python benchmarks/bench_routes.py --compare results/OLD.json results/NEW.json
+
+Routes that stream whole tables (/export) are skipped unless --include-export.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+from werkzeug.serving import WSGIRequestHandler, make_server  # noqa: E402
+
+from app import app, db  # noqa: E402
+from models import Artist, Show, Venue  # noqa: E402
+from page_cache import detail_cache  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SKIPPED_ENDPOINTS = {"static"}
+POSTS = [
+    ("/venues/search", {"search_term": "the"}),
+    ("/artists/search", {"search_term": "the"}),
+]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def rss_mb():
+    """Current resident set size, falling back to the peak where /proc is absent."""
+
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def commit_id():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def sample_values():
+    with app.app_context():
+        show = db.session.query(Show.venue_id, Show.artist_id).order_by(Show.id).first()
+        values = {
+            "venue_id": show.venue_id if show else db.session.query(Venue.id).limit(1).scalar(),
+            "artist_id": show.artist_id if show else db.session.query(Artist.id).limit(1).scalar(),
+            "kind": "venues",
+            "fmt": "csv",
+        }
+        db.session.close()
+    return values
+
+
+def routes(include_export=False):
+    """Returns (method, url, form) for each benchmarked route."""
+
+    skipped = SKIPPED_ENDPOINTS | (set() if include_export else {"export"})
+    values = sample_values()
+    found = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if rule.endpoint in skipped or "GET" not in rule.methods:
+            continue
+        try:
+            url = rule.build({arg: values[arg] for arg in rule.arguments})[1]
+        except KeyError:
+            print(f"skipping {rule.rule}: no sample value for its arguments")
+            continue
+        found.append(("GET", url, None))
+    found += [("POST", url, form) for url, form in POSTS]
+    return found
+
+
+class QueryCounter:
+    """Counts the statements run on any of `engines`."""
+
+    def __init__(self, *engines):
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+class TestClientDriver:
+    def __init__(self):
+        self.client = app.test_client()
+
+    def request(self, method, url, form):
+        response = self.client.open(url, method=method, data=form)
+        response.get_data()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class ServerDriver:
+    """Sends real HTTP requests to a single-threaded server in this process."""
+
+    def __init__(self):
+        self.server = make_server("127.0.0.1", 0, app, request_handler=QuietRequestHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection("127.0.0.1", self.server.server_port)
+
+    def request(self, method, url, form):
+        body = urlencode(form) if form else None
+        headers = {"Content-Type": "application/x-www-form-urlencoded"} if form else {}
+        self.connection.request(method, url, body=body, headers=headers)
+        response = self.connection.getresponse()
+        response.read()
+        return response.status
+
+    def close(self):
+        self.connection.close()
+        self.server.shutdown()
+
+
+def bench(driver, counter, method, url, form, requests, warmup, cold):
+    for _ in range(warmup):
+        driver.request(method, url, form)
+
+    timings, queries, statuses = [], [], set()
+    for _ in range(requests):
+        if cold:
+            detail_cache.clear()
+        before = counter.count
+        start = time.perf_counter()
+        statuses.add(driver.request(method, url, form))
+        timings.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count - before)
+
+    return {
+        "method": method,
+        "url": url,
+        "status": sorted(statuses),
+        "requests": requests,
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "queries_per_request": round(sum(queries) / len(queries), 2),
+        "rss_mb": rss_mb(),
+    }
+
+
+def run(args):
+    with app.app_context():
+        counts = {
+            "venues": db.session.query(Venue.id).count(),
+            "artists": db.session.query(Artist.id).count(),
+            "shows": db.session.query(Show.id).count(),
+        }
+        db.session.close()
+
+    # Read-only routes run on a replica when DATABASE_REPLICA_URLS is set.
+    counter = QueryCounter(
+        db.engine, *(replica.engine for replica in app.extensions["replicas"].replicas)
+    )
+    driver = ServerDriver() if args.server else TestClientDriver()
+    results = []
+    try:
+        for method, url, form in routes(args.include_export):
+            result = bench(
+                driver, counter, method, url, form, args.requests, args.warmup, args.cold
+            )
+            results.append(result)
+            print(f"{method:<5}{url:<36}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                  f"{result['p99_ms']:>9.2f}{result['queries_per_request']:>8.1f}"
+                  f"{result['rss_mb']:>9.1f}")
+    finally:
+        driver.close()
+
+    run_info = {
+        "commit": commit_id(),
+        "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": db.engine.dialect.name,
+        "driver": "server" if args.server else "test_client",
+        "cold_cache": args.cold,
+        "rows": counts,
+        "routes": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"routes-{run_info['started_at'].replace(':', '')}-{run_info['commit'] or 'nogit'}.json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(run_info, f, indent=2)
+    print(f"results written to {output}")
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    before = {(route["method"], route["url"]): route for route in old["routes"]}
+
+    print(f"{old['commit']} -> {new['commit']}")
+    print(f"{'route':<41}{'p50 ms':>16}{'p95 ms':>16}{'queries':>12}")
+    for route in new["routes"]:
+        key = (route["method"], route["url"])
+        if key not in before:
+            print(f"{' '.join(key):<41}{'(new)':>16}")
+            continue
+        prev = before[key]
+        print(f"{' '.join(key):<41}"
+              f"{prev['p50_ms']:>7.2f} {route['p50_ms']:>8.2f}"
+              f"{prev['p95_ms']:>7.2f} {route['p95_ms']:>8.2f}"
+              f"{prev['queries_per_request']:>5.1f} {route['queries_per_request']:>6.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--server", action="store_true",
+                        help="go through a local WSGI server instead of the test client")
+    parser.add_argument("--cold", action="store_true",
+                        help="clear the detail fragment cache before every request")
+    parser.add_argument("--include-export", action="store_true")
+    parser.add_argument("--output", help=f"defaults to a new file in {RESULTS_DIR}")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="print the differences between two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        print(f"{'':<41}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>8}{'rss MB':>9}")
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
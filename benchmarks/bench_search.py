@@ -0,0 +1,54 @@
+"""Compares the in-memory trigram index with the ILIKE query path.
+
+Runs against the database configured in config.py:
+
+    python benchmarks/bench_search.py [--repeat 200] term [term ...]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db  # noqa: E402
+from models import Venue  # noqa: E402
+from ngram_index import NGramIndex  # noqa: E402
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("terms", nargs="*", default=["the", "club", "hall", "x"])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with app.app_context():
+        index = NGramIndex()
+        start = time.perf_counter()
+        index.build(db.session.query(Venue.id, Venue.name).yield_per(1000))
+        print(f"indexed {len(index)} venues in "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+        print(f"{'term':<16}{'matches':>9}{'ilike ms':>12}{'index ms':>12}")
+        for term in args.terms:
+            ilike_ms, rows = timed(
+                lambda: db.session.query(Venue.id)
+                .filter(Venue.name.ilike(f"%{term}%"))
+                .all(),
+                args.repeat,
+            )
+            index_ms, ids = timed(lambda: index.search(term), args.repeat)
+            assert len(rows) == len(ids), (term, len(rows), len(ids))
+            print(f"{term:<16}{len(ids):>9}{ilike_ms:>12.3f}{index_ms:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
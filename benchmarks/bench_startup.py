@@ -0,0 +1,103 @@
+"""Worker startup time and first-request latency, with and without the
+precompiled template cache and warm-up.
+
+Each run starts a fresh interpreter that imports the app (what a new worker
+does) and then requests every warm-up URL once through the test client,
+timing the import and each first request. Three configurations are compared:
+
+    source     no bytecode cache; templates compiled on first render
+    bytecode   templates loaded from ``flask compile-templates`` output
+    warmup     bytecode plus TEMPLATE_WARMUP at import
+
+    python benchmarks/bench_startup.py [--runs 5] [--output startup.json]
+
+Point DATABASE_URL at a seeded database (benchmarks/seed.py) first.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child():
+    """Runs in the fresh interpreter; prints the timings as JSON."""
+
+    started = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    from app import app
+    from template_cache import WARMUP_URLS
+
+    timings = {"import_ms": (time.perf_counter() - started) * 1000}
+    client = app.test_client()
+    for url in WARMUP_URLS:
+        requested = time.perf_counter()
+        client.get(url)
+        timings[url] = (time.perf_counter() - requested) * 1000
+    timings["first_requests_ms"] = sum(timings[url] for url in WARMUP_URLS)
+    print(json.dumps(timings))
+
+
+def compile_templates(directory):
+    subprocess.run(
+        [sys.executable, "-m", "flask", "compile-templates", "--dir", directory],
+        cwd=ROOT,
+        env=dict(os.environ, FLASK_APP="app"),
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def measure(env, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            cwd=ROOT,
+            env=dict(os.environ, **env),
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        samples.append(json.loads(output.splitlines()[-1]))
+    return {key: round(statistics.median(s[key] for s in samples), 1) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="also write the results as JSON here")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child()
+
+    with tempfile.TemporaryDirectory() as directory:
+        compile_templates(directory)
+        configurations = {
+            "source": {"TEMPLATE_CACHE_DIR": "", "TEMPLATE_WARMUP": "0"},
+            "bytecode": {"TEMPLATE_CACHE_DIR": directory, "TEMPLATE_WARMUP": "0"},
+            "warmup": {"TEMPLATE_CACHE_DIR": directory, "TEMPLATE_WARMUP": "1"},
+        }
+        results = {
+            name: measure(env, args.runs) for name, env in configurations.items()
+        }
+
+    keys = list(results["source"])
+    print(f"{'median ms':<22}" + "".join(f"{name:>10}" for name in results))
+    for key in keys:
+        print(f"{key:<22}" + "".join(f"{results[name][key]:>10}" for name in results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Generates a synthetic Fyyur dataset at a configurable scale.
+
+City, genre, venue and artist popularity follow Zipf-like distributions, so
+a few cities and genres dominate and a few venues/artists carry most of the
+shows, as in production. Records go through bulk_import.load_records() (COPY
+on PostgreSQL) into the database configured in config.py, or are written as
+NDJSON files for ``flask import`` with --output:
+
+    python benchmarks/seed.py --venues 100000 --artists 200000 --shows 5000000
+    python benchmarks/seed.py --scale 0.01 --output data/
+
+Ids are explicit and start after the current maximum, so seeding an
+existing database adds to it. The same --seed gives the same dataset.
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func  # noqa: E402
+
+from app import app, db  # noqa: E402  (before bulk_import, which app imports)
+import bulk_import  # noqa: E402
+from forms import VenueForm  # noqa: E402
+from models import Artist, Venue  # noqa: E402
+
+CITIES = [
+    ("New York", "NY"), ("Los Angeles", "CA"), ("Chicago", "IL"),
+    ("Houston", "TX"), ("Phoenix", "AZ"), ("Philadelphia", "PA"),
+    ("San Antonio", "TX"), ("San Diego", "CA"), ("Dallas", "TX"),
+    ("San Jose", "CA"), ("Austin", "TX"), ("Jacksonville", "FL"),
+    ("San Francisco", "CA"), ("Columbus", "OH"), ("Fort Worth", "TX"),
+    ("Indianapolis", "IN"), ("Charlotte", "NC"), ("Seattle", "WA"),
+    ("Denver", "CO"), ("Washington", "DC"), ("Boston", "MA"),
+    ("Nashville", "TN"), ("Detroit", "MI"), ("Portland", "OR"),
+    ("Las Vegas", "NV"), ("Memphis", "TN"), ("Louisville", "KY"),
+    ("Baltimore", "MD"), ("Milwaukee", "WI"), ("Albuquerque", "NM"),
+    ("Tucson", "AZ"), ("Fresno", "CA"), ("Sacramento", "CA"),
+    ("Atlanta", "GA"), ("Miami", "FL"), ("Minneapolis", "MN"),
+    ("New Orleans", "LA"), ("Cleveland", "OH"), ("Honolulu", "HI"),
+    ("Anchorage", "AK"),
+]
+GENRES = [name for name, _ in VenueForm.genres.kwargs["choices"]]
+
+VENUE_WORDS = ["The", "Blue", "Red", "Old", "Golden", "Velvet", "Rusty",
+               "Grand", "Little", "Electric", "Silver", "Broken", "Hidden"]
+VENUE_KINDS = ["Hall", "Club", "Room", "Lounge", "Theatre", "Tavern", "Bar",
+               "Garden", "Loft", "Cellar", "Ballroom", "Arena", "Saloon"]
+FIRST_NAMES = ["Guns", "Matt", "Sam", "The Wild", "Nina", "Miles", "Ella",
+               "Black", "Arctic", "Lana", "Kendrick", "Joni", "Neon", "Young"]
+LAST_NAMES = ["N Petals", "Quevedo", "Sisters", "Simone", "Davis", "Hounds",
+              "Monkeys", "Del Rey", "Lamar", "Mitchell", "Trees", "Fathers"]
+
+
+class Zipf:
+    """Draws indexes 0..n-1 with P(i) proportional to 1 / (i + 1) ** s."""
+
+    def __init__(self, n, s, rng):
+        self.rng = rng
+        self.cumulative = list(
+            itertools.accumulate(1 / (i + 1) ** s for i in range(n))
+        )
+
+    def __call__(self):
+        point = self.rng.random() * self.cumulative[-1]
+        return bisect.bisect_left(self.cumulative, point)
+
+
+def _entity(rng, id_, name, city, genre):
+    city_name, state = CITIES[city()]
+    genres = dict.fromkeys(GENRES[genre()] for _ in range(rng.randint(1, 3)))
+    return {
+        "id": id_,
+        "name": name,
+        "city": city_name,
+        "state": state,
+        "phone": f"{rng.randint(200, 999)}-{rng.randint(200, 999)}-"
+                 f"{rng.randint(0, 9999):04d}",
+        "image_link": f"https://picsum.photos/seed/{id_}/300/300",
+        "facebook_link": f"https://www.facebook.com/{id_}",
+        "website": f"https://example.com/{id_}" if rng.random() < 0.6 else None,
+        "seeking_description": "Looking for talent" if rng.random() < 0.3 else None,
+        "genres": list(genres),
+    }
+
+
+def venues(rng, first_id, count, city, genre):
+    for id_ in range(first_id, first_id + count):
+        name = f"{rng.choice(VENUE_WORDS)} {rng.choice(VENUE_KINDS)} {id_}"
+        record = _entity(rng, id_, name, city, genre)
+        record["address"] = f"{rng.randint(1, 9999)} {rng.choice(VENUE_WORDS)} St"
+        record["seeking_talent"] = rng.random() < 0.3
+        yield record
+
+
+def artists(rng, first_id, count, city, genre):
+    for id_ in range(first_id, first_id + count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {id_}"
+        record = _entity(rng, id_, name, city, genre)
+        record["seeking_venue"] = rng.random() < 0.3
+        yield record
+
+
+def shows(rng, count, venue_ids, artist_ids, skew, now):
+    """Evening shows over the past three years and the coming year, with venue
+    and artist popularity drawn independently from a Zipf distribution (over a
+    shuffled id order, so popularity does not follow id)."""
+
+    venue_ids, artist_ids = list(venue_ids), list(artist_ids)
+    rng.shuffle(venue_ids)
+    rng.shuffle(artist_ids)
+    venue, artist = Zipf(len(venue_ids), skew, rng), Zipf(len(artist_ids), skew, rng)
+    first_day = now.replace(hour=0) - timedelta(days=3 * 365)
+    for _ in range(count):
+        start_time = first_day + timedelta(
+            days=rng.randrange(4 * 365),
+            hours=rng.randint(17, 23),
+            minutes=rng.choice((0, 30)),
+        )
+        yield {
+            "venue_id": venue_ids[venue()],
+            "artist_id": artist_ids[artist()],
+            "start_time": start_time.isoformat(),
+        }
+
+
+def write_ndjson(path, records):
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record))
+            f.write("\n")
+            count += 1
+    print(f"wrote {count} records to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--venues", type=int, default=100000)
+    parser.add_argument("--artists", type=int, default=200000)
+    parser.add_argument("--shows", type=int, default=5000000)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiplies the three counts above")
+    parser.add_argument("--skew", type=float, default=1.1,
+                        help="Zipf exponent for city, genre and show popularity")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--output", help="write NDJSON files here instead of loading")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    city = Zipf(len(CITIES), args.skew, rng)
+    genre = Zipf(len(GENRES), args.skew, rng)
+    n_venues = int(args.venues * args.scale)
+    n_artists = int(args.artists * args.scale)
+    n_shows = int(args.shows * args.scale)
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+
+    with app.app_context():
+        first_venue = (db.session.query(func.max(Venue.id)).scalar() or 0) + 1
+        first_artist = (db.session.query(func.max(Artist.id)).scalar() or 0) + 1
+        db.session.close()
+
+        generated = [
+            ("venues", venues(rng, first_venue, n_venues, city, genre)),
+            ("artists", artists(rng, first_artist, n_artists, city, genre)),
+            ("shows", shows(
+                rng,
+                n_shows,
+                range(first_venue, first_venue + n_venues),
+                range(first_artist, first_artist + n_artists),
+                args.skew,
+                now,
+            )),
+        ]
+        if args.output:
+            os.makedirs(args.output, exist_ok=True)
+            for kind, records in generated:
+                write_ndjson(os.path.join(args.output, f"{kind}.ndjson"), records)
+            return
+
+        for kind, records in generated:
+            loaded, rejected = bulk_import.load_records(
+                kind, records, args.batch_size
+            )
+            print(f"seeded {loaded} {kind} ({rejected} rejected)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Streamed CSV/NDJSON export of venues, artists and shows.
+
+Rows are read through a server-side cursor (``yield_per``) in id order and
+serialized one chunk at a time, so a worker's memory stays flat whatever the
+table size. Output is compatible with ``flask import``; pass the last id
+received as ``after_id`` to resume an interrupted export.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+from app import db
+from archive import all_shows
+from bulk_import import batched
+from models import Artist, Genre, Show, Venue, artist_genre, venue_genre
+
+ENTITY_COLUMNS = [
+    "id",
+    "name",
+    "city",
+    "state",
+    "phone",
+    "image_link",
+    "facebook_link",
+    "website",
+    "seeking_description",
+    "upcoming_shows_count",
+    "past_shows_count",
+    "updated_at",
+]
+
+KINDS = {
+    "venues": (
+        Venue,
+        ENTITY_COLUMNS + ["address", "seeking_talent", "genres"],
+        (venue_genre, venue_genre.c.venue_id),
+    ),
+    "artists": (
+        Artist,
+        ENTITY_COLUMNS + ["seeking_venue", "genres"],
+        (artist_genre, artist_genre.c.artist_id),
+    ),
+    "shows": (
+        Show,
+        ["id", "artist_id", "venue_id", "start_time", "updated_at"],
+        None,
+    ),
+}
+
+MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _genre_names(genres, ids):
+    genre_table, owner_fk = genres
+    names = {}
+    rows = (
+        db.session.query(owner_fk, Genre.name)
+        .join(Genre, Genre.id == genre_table.c.genre_id)
+        .filter(owner_fk.in_(ids))
+        .order_by(owner_fk, Genre.name)
+    )
+    for owner_id, name in rows:
+        names.setdefault(owner_id, []).append(name)
+    return names
+
+
+def iter_records(kind, after_id=0, chunk_size=1000):
+    """Yields lists of up to `chunk_size` record dicts with id > `after_id`."""
+
+    model, columns, genres = KINDS[kind]
+    if model is Show:
+        # Archived shows are exported too, in the same id order.
+        model = all_shows().c
+    selected = [getattr(model, column) for column in columns if column != "genres"]
+    query = (
+        db.session.query(*selected)
+        .filter(model.id > after_id)
+        .order_by(model.id)
+        .yield_per(chunk_size)
+    )
+    for chunk in batched(query, chunk_size):
+        records = [dict(row._mapping) for row in chunk]
+        if genres is not None:
+            names = _genre_names(genres, [record["id"] for record in records])
+            for record in records:
+                record["genres"] = names.get(record["id"], [])
+        yield records
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return ";".join(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream(kind, fmt, after_id=0, chunk_size=1000):
+    """Yields the export as text chunks, one per database chunk."""
+
+    columns = KINDS[kind][1]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if fmt == "csv":
+        writer.writerow(columns)
+        yield buffer.getvalue()
+
+    for records in iter_records(kind, after_id, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        for record in records:
+            if fmt == "csv":
+                writer.writerow([_csv_value(record[column]) for column in columns])
+            else:
+                buffer.write(json.dumps(record, default=_json_default))
+                buffer.write("\n")
+        yield buffer.getvalue()
@@ -0,0 +1,344 @@
+"""Streaming bulk import of venues, artists and shows (``flask import``).
+
+Records are read lazily from CSV or NDJSON, validated and loaded one batch
+at a time, so memory use depends on the batch size and not on the file
+size. On PostgreSQL each batch is written with ``COPY ... FROM STDIN``;
+other backends get a batched ``executemany`` INSERT. Every batch is
+committed on its own, so an interrupted import keeps the batches already
+loaded.
+
+Venue and artist records may carry an ``id`` (so a shows file can refer to
+them) and a ``genres`` field: a list in NDJSON, ``;``-separated in CSV.
+"""
+
+import csv
+import io
+import json
+import re
+import time
+from datetime import datetime
+from itertools import islice
+
+import dateutil.parser
+from sqlalchemy import func, text
+
+from app import db
+from counters import record_show_rows
+from genres import resolve_genres
+from models import Artist, Show, Venue, artist_genre, venue_genre
+
+TRUE_VALUES = {"1", "t", "true", "y", "yes", "on"}
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+# ----------------------------------------------------------------------------#
+# Reading.
+# ----------------------------------------------------------------------------#
+
+
+def read_records(path, fmt=None):
+    """Yields one dict per record of a .csv or .ndjson/.jsonl file."""
+
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "ndjson")
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def batched(records, size):
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+# ----------------------------------------------------------------------------#
+# Validation.
+# ----------------------------------------------------------------------------#
+
+
+def _text(record, *names):
+    for name in names:
+        value = record.get(name)
+        if value not in (None, ""):
+            return str(value).strip()
+    return None
+
+
+def _required(record, name):
+    value = _text(record, name)
+    if value is None:
+        raise InvalidRecord(f"missing {name}")
+    return value
+
+
+def _flag(record, name):
+    value = record.get(name)
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in TRUE_VALUES
+
+
+def _genres(record):
+    value = record.get("genres") or []
+    if isinstance(value, str):
+        value = value.split(";")
+    return [name.strip() for name in value if name and name.strip()]
+
+
+def _id(record):
+    value = _text(record, "id")
+    return int(value) if value is not None else None
+
+
+def _phone(record):
+    # The pages format phones as ddd-ddd-dddd; an empty one would also load
+    # as NULL through COPY but as "" through executemany.
+    phone = re.sub(r"\D", "", _required(record, "phone"))
+    if not phone:
+        raise InvalidRecord("phone has no digits")
+    return phone
+
+
+def _check_lengths(model, row):
+    """Rejects values longer than their String(n) column, which would
+    otherwise abort the whole batch in the database."""
+
+    for column, value in row.items():
+        length = getattr(model.__table__.c[column].type, "length", None)
+        if isinstance(value, str) and length and len(value) > length:
+            raise InvalidRecord(f"{column} longer than {length} characters")
+    return row
+
+
+def _common(record, now):
+    return {
+        "id": _id(record),
+        "name": _required(record, "name"),
+        "city": _required(record, "city"),
+        "state": _required(record, "state"),
+        "phone": _phone(record),
+        "image_link": _text(record, "image_link"),
+        "facebook_link": _text(record, "facebook_link"),
+        "website": _text(record, "website", "website_link"),
+        "seeking_description": _text(record, "seeking_description"),
+        "updated_at": now,
+    }
+
+
+def venue_row(record, now):
+    row = _common(record, now)
+    row["address"] = _text(record, "address")
+    row["seeking_talent"] = _flag(record, "seeking_talent")
+    return _check_lengths(Venue, row)
+
+
+def artist_row(record, now):
+    row = _common(record, now)
+    row["seeking_venue"] = _flag(record, "seeking_venue")
+    return _check_lengths(Artist, row)
+
+
+def show_row(record, now):
+    start_time = _required(record, "start_time")
+    try:
+        start_time = dateutil.parser.parse(start_time)
+    except (ValueError, OverflowError):
+        raise InvalidRecord(f"bad start_time {start_time!r}")
+    return {
+        "artist_id": int(_required(record, "artist_id")),
+        "venue_id": int(_required(record, "venue_id")),
+        "start_time": start_time,
+        "counted_upcoming": start_time > datetime.now(),
+        "updated_at": now,
+    }
+
+
+def _existing_ids(model, ids):
+    if not ids:
+        return set()
+    return {id_ for (id_,) in db.session.query(model.id).filter(model.id.in_(ids))}
+
+
+def check_show_references(rows, errors):
+    """Drops show rows whose venue or artist does not exist (one query each)."""
+
+    venues = _existing_ids(Venue, {row["venue_id"] for row in rows})
+    artists = _existing_ids(Artist, {row["artist_id"] for row in rows})
+    valid = []
+    for row in rows:
+        if row["venue_id"] not in venues:
+            errors.append(f"unknown venue_id {row['venue_id']}")
+        elif row["artist_id"] not in artists:
+            errors.append(f"unknown artist_id {row['artist_id']}")
+        else:
+            valid.append(row)
+    return valid
+
+
+# ----------------------------------------------------------------------------#
+# Loading.
+# ----------------------------------------------------------------------------#
+
+
+def _copy_value(value):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def copy_rows(table, rows):
+    """Writes `rows` (dicts with identical keys) into `table` in one statement."""
+
+    if not rows:
+        return
+    columns = list(rows[0])
+
+    if db.engine.dialect.name != "postgresql":
+        db.session.execute(table.insert(), rows)
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+
+    quoted = ", ".join(f'"{column}"' for column in columns)
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f'COPY "{table.name}" ({quoted}) FROM STDIN WITH (FORMAT csv)', buffer
+        )
+    finally:
+        cursor.close()
+
+
+def _allocate_ids(model, rows):
+    """Gives rows without an explicit id one from the table's sequence, so the
+    genre associations can be written before the rows come back from COPY.
+    """
+
+    missing = [row for row in rows if row["id"] is None]
+    if not missing:
+        return
+    if db.engine.dialect.name == "postgresql":
+        ids = db.session.execute(
+            text(
+                "SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+                "FROM generate_series(1, :n)"
+            ),
+            {"table": f'"{model.__tablename__}"', "n": len(missing)},
+        ).scalars()
+    else:
+        # Without sequences the import assumes it is the only writer.
+        start = (db.session.query(func.max(model.id)).scalar() or 0) + 1
+        start = max([start] + [row["id"] + 1 for row in rows if row["id"] is not None])
+        ids = range(start, start + len(missing))
+    for row, id_ in zip(missing, ids):
+        row["id"] = id_
+
+
+def _sync_sequence(model):
+    if db.engine.dialect.name == "postgresql":
+        db.session.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence(:table, 'id'), "
+                f'(SELECT coalesce(max(id), 1) FROM "{model.__tablename__}"))'
+            ),
+            {"table": f'"{model.__tablename__}"'},
+        )
+
+
+def _load_with_genres(model, genre_table, owner_key, rows, genre_lists):
+    _allocate_ids(model, rows)
+
+    names = {name for names in genre_lists for name in names}
+    genre_ids = {genre.name: genre.id for genre in resolve_genres(names)}
+
+    copy_rows(model.__table__, rows)
+    copy_rows(
+        genre_table,
+        [
+            {"genre_id": genre_ids[name], owner_key: row["id"]}
+            for row, names in zip(rows, genre_lists)
+            for name in dict.fromkeys(names)
+        ],
+    )
+
+
+KINDS = {
+    "venues": (Venue, venue_row),
+    "artists": (Artist, artist_row),
+    "shows": (Show, show_row),
+}
+
+
+def import_file(kind, path, fmt=None, batch_size=5000, report=print):
+    """Imports every record of `path` as `kind`; returns (loaded, rejected)."""
+
+    return load_records(kind, read_records(path, fmt), batch_size, report)
+
+
+def load_records(kind, records, batch_size=5000, report=print):
+    """Loads an iterable of record dicts as `kind`; returns (loaded, rejected)."""
+
+    model, make_row = KINDS[kind]
+    loaded = rejected = 0
+    explicit_ids = False
+    started = time.perf_counter()
+
+    for number, batch in enumerate(batched(records, batch_size), 1):
+        now = datetime.utcnow()
+        rows, genre_lists, errors = [], [], []
+        for record in batch:
+            try:
+                rows.append(make_row(record, now))
+                genre_lists.append(_genres(record))
+            except (InvalidRecord, ValueError, TypeError) as e:
+                errors.append(str(e))
+
+        try:
+            if model is Show:
+                rows = check_show_references(rows, errors)
+                copy_rows(model.__table__, rows)
+                record_show_rows(rows)
+            else:
+                explicit_ids = explicit_ids or any(row["id"] is not None for row in rows)
+                genre_table, owner_key = (
+                    (venue_genre, "venue_id") if model is Venue else (artist_genre, "artist_id")
+                )
+                _load_with_genres(model, genre_table, owner_key, rows, genre_lists)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        loaded += len(rows)
+        rejected += len(errors)
+        for error in errors[:5]:
+            report(f"  rejected: {error}")
+        elapsed = time.perf_counter() - started
+        report(
+            f"batch {number}: {loaded} loaded, {rejected} rejected, "
+            f"{loaded / elapsed if elapsed else 0:.0f} rows/s"
+        )
+
+    if explicit_ids:
+        _sync_sequence(model)
+        db.session.commit()
+    db.session.close()
+    return loaded, rejected
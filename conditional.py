@@ -0,0 +1,157 @@
+"""Conditional GET support for the read routes.
+
+Each validator below derives a (etag, last_modified) pair for a route from
+the ``updated_at`` columns with one small aggregate query, so a client
+holding a current copy gets ``304 Not Modified`` without the view querying
+or rendering anything.
+"""
+
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from flask import g, make_response, request, session
+from sqlalchemy import case, func, select
+
+from app import app, db
+from archive import all_shows
+from models import Artist, Show, Venue
+
+
+def _etag(*parts):
+    key = repr((app.config["RELEASE"], request.full_path) + parts)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _latest(*stamps):
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    return max(stamps) if stamps else None
+
+
+def conditional(validator):
+    """Answers a GET with 304 when the client's validators are still current.
+
+    `validator` receives the view arguments and returns (etag, last_modified),
+    or None when the request cannot be validated cheaply.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Pending flash messages are rendered into the page; never let a
+            # 304 swallow them.
+            if "_flashes" in session:
+                return view(*args, **kwargs)
+
+            validators = validator(*args, **kwargs)
+            if validators is None:
+                return view(*args, **kwargs)
+            etag, last_modified = validators
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = (
+                    since is not None
+                    and last_modified is not None
+                    and last_modified.replace(microsecond=0) <= since.replace(tzinfo=None)
+                )
+
+            response = make_response(("", 304) if not_modified else view(*args, **kwargs))
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def static_page():
+    return _etag(), None
+
+
+def _listing(*models, counted=()):
+    """`counted` models also contribute their row count, for tables rows are
+    deleted from (a DELETE never raises max(updated_at))."""
+
+    stamps = db.session.query(
+        *(select(func.max(model.updated_at)).scalar_subquery() for model in models),
+        *(select(func.count()).select_from(model).scalar_subquery() for model in counted),
+    ).one()
+    last_modified = _latest(*stamps[: len(models)])
+    return _etag(*stamps), last_modified
+
+
+def venues_listing():
+    return _listing(Venue)
+
+
+def artists_listing():
+    return _listing(Artist)
+
+
+def shows_listing():
+    # archive.archive_shows() deletes shows from the listed table.
+    return _listing(Show, Venue, Artist, counted=(Show,))
+
+
+def _stamp_query(model, owner_key, other, other_key, id_):
+    now = datetime.now()
+    # Archived shows are listed on the page too, so they count here as well.
+    shows = all_shows()
+    return (
+        select(
+            model.updated_at,
+            func.max(shows.c.updated_at),
+            func.max(other.updated_at),
+            # How many shows have started; moves the past/upcoming boundary.
+            func.count(case((shows.c.start_time <= now, shows.c.id))),
+        )
+        .select_from(model)
+        .outerjoin(shows, shows.c[owner_key] == model.id)
+        .outerjoin(other, shows.c[other_key] == other.id)
+        .where(model.id == id_)
+        .group_by(model.id)
+    )
+
+
+def venue_stamp_query(venue_id):
+    return _stamp_query(Venue, "venue_id", Artist, "artist_id", venue_id)
+
+
+def artist_stamp_query(artist_id):
+    return _stamp_query(Artist, "artist_id", Venue, "venue_id", artist_id)
+
+
+STAMP_QUERIES = {"venue": venue_stamp_query, "artist": artist_stamp_query}
+
+
+def detail_stamp(kind, id_):
+    """The database state a venue/artist detail page is rendered from, as a
+    tuple, or None for an unknown id. Read once per request: the validator
+    and the view's fragment cache lookup share it."""
+
+    stamps = g.setdefault("detail_stamps", {})
+    if (kind, id_) not in stamps:
+        row = db.session.execute(STAMP_QUERIES[kind](id_)).one_or_none()
+        stamps[(kind, id_)] = tuple(row) if row is not None else None
+    return stamps[(kind, id_)]
+
+
+def _detail(kind, id_):
+    stamp = detail_stamp(kind, id_)
+    if stamp is None:
+        return None
+    return _etag(*stamp), _latest(*stamp[:3])
+
+
+def venue_detail(venue_id):
+    return _detail("venue", venue_id)
+
+
+def artist_detail(artist_id):
+    return _detail("artist", artist_id)
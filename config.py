@@ -1,5 +1,6 @@
 import os
-SECRET_KEY = os.urandom(32)
+# Must be shared by all workers for sessions (flashes, replica stickiness).
+SECRET_KEY = os.environ.get('SECRET_KEY') or os.urandom(32)
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
@@ -7,11 +8,96 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 DEBUG = True
 
 # Connect to the database
-DB_USER = 'postgres'
-DB_PWD = 'postgres'
-DB_HOST = 'localhost'
-DB_NAME = 'fyyur'
-DB_PORT = '5432'
+DB_USER = os.environ.get('DB_USER', 'postgres')
+DB_PWD = os.environ.get('DB_PWD', 'postgres')
+DB_HOST = os.environ.get('DB_HOST', 'localhost')
+DB_NAME = os.environ.get('DB_NAME', 'fyyur')
+DB_PORT = os.environ.get('DB_PORT', '5432')
 
-SQLALCHEMY_DATABASE_URI = f'postgresql://{DB_USER}:{DB_PWD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+SQLALCHEMY_DATABASE_URI = os.environ.get(
+    'DATABASE_URL',
+    f'postgresql://{DB_USER}:{DB_PWD}@{DB_HOST}:{DB_PORT}/{DB_NAME}')
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Connection pool, per worker process; see db_pool.engine_options().
+# "pgbouncer" hands pooling to PgBouncer in transaction mode: no client-side
+# pool, and session settings are applied per transaction.
+DB_POOL_MODE = os.environ.get('DB_POOL_MODE', 'queue')
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1').lower() in ('1', 'true', 'yes')
+# Milliseconds; 0 leaves the server default.
+DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 0))
+
+# Comma-separated read replicas for views marked read_only; see routing.py.
+DATABASE_REPLICA_URLS = os.environ.get('DATABASE_REPLICA_URLS', '')
+# Seconds a client stays on the primary after committing a write.
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+REPLICA_HEALTH_INTERVAL = int(os.environ.get('REPLICA_HEALTH_INTERVAL', 10))
+REPLICA_RETRY_SECONDS = int(os.environ.get('REPLICA_RETRY_SECONDS', 30))
+
+# Per-request query counting/timing and Server-Timing headers; see
+# request_timing.py. A statement shape repeated this often in one request is
+# logged as a possible N+1.
+SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', '1').lower() in ('1', 'true', 'yes')
+SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 5))
+
+# Prometheus metrics at /metrics; see metrics.py. Under a pre-forking server
+# point METRICS_MULTIPROC_DIR at an empty directory shared by the workers.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() in ('1', 'true', 'yes')
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR', '')
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 1))
+
+# Sampling profiler; see profiling.py. Requests with a valid X-Profile
+# header (flask profile-token) and a PROFILE_SAMPLE_RATE fraction of all
+# requests are profiled, with dumps written to PROFILE_DIR.
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(basedir, 'profiles'))
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+PROFILE_TOKEN_MAX_AGE = int(os.environ.get('PROFILE_TOKEN_MAX_AGE', 7 * 24 * 3600))
+
+# Compiled template bytecode written by ``flask compile-templates`` and read
+# by the workers; empty disables it. TEMPLATE_WARMUP renders the main pages
+# once when a worker starts (see template_cache.py).
+TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR', os.path.join(basedir, 'template_cache'))
+TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', '0').lower() in ('1', 'true', 'yes')
+
+# Async read path (asgi.py). Defaults to the primary through asyncpg; point it
+# at a replica to move the async reads there.
+ASYNC_DATABASE_URL = os.environ.get(
+    'ASYNC_DATABASE_URL',
+    SQLALCHEMY_DATABASE_URI.replace('postgresql://', 'postgresql+asyncpg://', 1))
+ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE', 20))
+ASYNC_DB_MAX_OVERFLOW = int(os.environ.get('ASYNC_DB_MAX_OVERFLOW', 20))
+
+# Months ahead for which ``flask create-partitions`` keeps a Show partition
+# (PostgreSQL, once Show is partitioned by month).
+SHOW_PARTITION_MONTHS_AHEAD = int(os.environ.get("SHOW_PARTITION_MONTHS_AHEAD", 12))
+
+# ``flask archive-shows`` moves shows that started more than this many days
+# ago out of Show into ShowArchive, this many rows per transaction.
+SHOW_ARCHIVE_AFTER_DAYS = int(os.environ.get("SHOW_ARCHIVE_AFTER_DAYS", 365))
+SHOW_ARCHIVE_BATCH_SIZE = int(os.environ.get("SHOW_ARCHIVE_BATCH_SIZE", 5000))
+
+# Listing page sizes. Pages are fetched by keyset cursor, so these bound both
+# the rows materialized per request and the rendered response size.
+SHOWS_PER_PAGE = int(os.environ.get("SHOWS_PER_PAGE", 48))
+VENUES_PER_PAGE = int(os.environ.get("VENUES_PER_PAGE", 100))
+ARTISTS_PER_PAGE = int(os.environ.get("ARTISTS_PER_PAGE", 100))
+
+# Upper bound on ranked rows returned by the venue/artist search routes.
+SEARCH_MAX_RESULTS = int(os.environ.get("SEARCH_MAX_RESULTS", 100))
+
+# "memory" answers name searches from an in-process trigram index built at
+# startup (for deployments without pg_trgm); "database" queries directly.
+SEARCH_INDEX = os.environ.get("SEARCH_INDEX", "database")
+
+# Rendered detail-page fragments kept per worker; a TTL of 0 disables caching.
+DETAIL_CACHE_SIZE = int(os.environ.get("DETAIL_CACHE_SIZE", 1024))
+DETAIL_CACHE_TTL = int(os.environ.get("DETAIL_CACHE_TTL", 300))
+
+# Mixed into every ETag so a deploy that changes templates invalidates
+# browser and CDN copies; set to the release/commit id.
+RELEASE = os.environ.get("RELEASE", "")
@@ -0,0 +1,113 @@
+"""Upcoming/past show counters stored on Venue and Artist.
+
+A show is counted as upcoming when it is created with a future start_time
+and stays so (Show.counted_upcoming) until rollover_shows() moves it to the
+past counters in bulk. Listing and search pages read the counters instead of
+aggregating Show.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import bindparam, func
+
+from app import db
+from models import Artist, Show, Venue
+
+
+def record_new_show(show, venue, artist, now=None):
+    """Counts a pending `show` on its venue and artist in the same transaction."""
+
+    now = now or datetime.now()
+    show.counted_upcoming = show.start_time > now
+    if show.counted_upcoming:
+        venue.upcoming_shows_count = Venue.upcoming_shows_count + 1
+        artist.upcoming_shows_count = Artist.upcoming_shows_count + 1
+    else:
+        venue.past_shows_count = Venue.past_shows_count + 1
+        artist.past_shows_count = Artist.past_shows_count + 1
+
+
+def _add_counts(model, key, shows):
+    counts = {}
+    for show in shows:
+        upcoming, past = counts.get(show[key], (0, 0))
+        if show["counted_upcoming"]:
+            upcoming += 1
+        else:
+            past += 1
+        counts[show[key]] = (upcoming, past)
+
+    table = model.__table__
+    db.session.execute(
+        table.update()
+        .where(table.c.id == bindparam("owner_id"))
+        .values(
+            upcoming_shows_count=table.c.upcoming_shows_count + bindparam("upcoming"),
+            past_shows_count=table.c.past_shows_count + bindparam("past"),
+        ),
+        [
+            {"owner_id": owner_id, "upcoming": upcoming, "past": past}
+            for owner_id, (upcoming, past) in counts.items()
+        ],
+    )
+
+
+def record_show_rows(shows):
+    """Counts a batch of inserted show rows (dicts with venue_id, artist_id and
+    counted_upcoming) on their venues and artists with two executemany UPDATEs.
+    """
+
+    if shows:
+        _add_counts(Venue, "venue_id", shows)
+        _add_counts(Artist, "artist_id", shows)
+
+
+def _move_counts(model, owner_fk, cutoff):
+    moved = (
+        db.session.query(owner_fk, func.count())
+        .filter(Show.counted_upcoming, Show.start_time <= cutoff)
+        .group_by(owner_fk)
+        .all()
+    )
+    if moved:
+        db.session.execute(
+            model.__table__.update()
+            .where(model.__table__.c.id == bindparam("owner_id"))
+            .values(
+                upcoming_shows_count=model.__table__.c.upcoming_shows_count
+                - bindparam("moved"),
+                past_shows_count=model.__table__.c.past_shows_count
+                + bindparam("moved"),
+            ),
+            [{"owner_id": owner_id, "moved": n} for owner_id, n in moved],
+        )
+
+
+def rollover_shows(now=None):
+    """Moves shows that have started from the upcoming to the past counters.
+
+    Returns the number of shows moved. Meant to run periodically, see the
+    ``flask rollover-shows`` command.
+    """
+
+    cutoff = now or datetime.now()
+    try:
+        # Lock the shows being moved so concurrent runs cannot count them twice.
+        db.session.query(Show.id).filter(
+            Show.counted_upcoming, Show.start_time <= cutoff
+        ).with_for_update().all()
+
+        _move_counts(Venue, Show.venue_id, cutoff)
+        _move_counts(Artist, Show.artist_id, cutoff)
+        moved = (
+            db.session.query(Show)
+            .filter(Show.counted_upcoming, Show.start_time <= cutoff)
+            .update({Show.counted_upcoming: False}, synchronize_session=False)
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.close()
+    return moved
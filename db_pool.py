@@ -0,0 +1,134 @@
+"""Engine/pool options from config plus pool checkout instrumentation.
+
+engine_options() turns the DB_* settings of config.py into
+SQLALCHEMY_ENGINE_OPTIONS. The pools it selects time every checkout, which
+pool_status() reports on the /health endpoint together with saturation.
+"""
+
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+class CheckoutStats:
+    """Checkout wait times of the last `window` checkouts and a timeout count."""
+
+    def __init__(self, window=1024):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._waits.append(seconds)
+            self.checkouts += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            checkouts, timeouts = self.checkouts, self.timeouts
+
+        def quantile(q):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 3)
+
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_ms_p50": quantile(0.50),
+            "wait_ms_p95": quantile(0.95),
+            "wait_ms_max": quantile(1.0),
+        }
+
+
+class _TimedCheckout:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = CheckoutStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeout:
+            self.stats.record_timeout()
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedNullPool(_TimedCheckout, NullPool):
+    pass
+
+
+def engine_options(config):
+    """Builds SQLALCHEMY_ENGINE_OPTIONS from the DB_* config values."""
+
+    url = config["SQLALCHEMY_DATABASE_URI"]
+    if not url.startswith("postgresql"):
+        return {}
+
+    options = {"pool_pre_ping": config["DB_POOL_PRE_PING"]}
+    timeout = config["DB_STATEMENT_TIMEOUT"]
+
+    if config["DB_POOL_MODE"] == "pgbouncer":
+        # PgBouncer rejects startup options in transaction mode, and pooled
+        # server connections are shared, so settings go in per transaction.
+        options["poolclass"] = InstrumentedNullPool
+    else:
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=config["DB_POOL_SIZE"],
+            max_overflow=config["DB_MAX_OVERFLOW"],
+            pool_timeout=config["DB_POOL_TIMEOUT"],
+            pool_recycle=config["DB_POOL_RECYCLE"],
+        )
+        if timeout:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def configure_engine(engine, config):
+    """Installs per-transaction settings needed in PgBouncer mode."""
+
+    timeout = config["DB_STATEMENT_TIMEOUT"]
+    if config["DB_POOL_MODE"] != "pgbouncer" or not timeout:
+        return
+
+    @event.listens_for(engine, "begin")
+    def set_statement_timeout(connection):
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+def pool_status(engine):
+    """Returns a JSON-able snapshot of the engine's pool."""
+
+    pool = engine.pool
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+            saturation=round(pool.checkedout() / capacity, 3) if capacity else None,
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
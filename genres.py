@@ -0,0 +1,77 @@
+"""Bulk Genre resolution for the venue and artist submission handlers.
+
+Submitted genre names are resolved to Genre rows with at most one IN query
+plus one ``INSERT ... ON CONFLICT DO NOTHING`` for names not seen before.
+Ids of committed genres are cached per process, so the fixed set of genres
+offered by the forms is resolved without touching the database at all.
+"""
+
+import threading
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import make_transient_to_detached
+
+from app import db
+from models import Genre
+
+_UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+_lock = threading.Lock()
+_genre_ids = {}
+
+
+def clear_genre_cache():
+    with _lock:
+        _genre_ids.clear()
+
+
+def _lookup(names):
+    return dict(
+        db.session.query(Genre.name, Genre.id).filter(Genre.name.in_(names))
+    )
+
+
+def _insert_missing(names):
+    insert = _UPSERT_DIALECTS.get(db.engine.dialect.name)
+    if insert is None:
+        db.session.add_all(Genre(name=name) for name in names)
+        db.session.flush()
+        return
+    db.session.execute(
+        insert(Genre)
+        .values([{"name": name} for name in names])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+
+
+def resolve_genres(names):
+    """Returns Genre instances for `names`, creating the missing ones.
+
+    Duplicates and blank names are dropped; the input order is kept.
+    """
+
+    names = list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+
+    with _lock:
+        ids = {name: _genre_ids[name] for name in names if name in _genre_ids}
+
+    missing = [name for name in names if name not in ids]
+    if missing:
+        found = _lookup(missing)
+        # Only ids that existed before this transaction are safe to cache;
+        # rows inserted below vanish if the caller rolls back.
+        with _lock:
+            _genre_ids.update(found)
+        ids.update(found)
+
+        absent = [name for name in missing if name not in found]
+        if absent:
+            _insert_missing(absent)
+            ids.update(_lookup(absent))
+
+    genres = []
+    for name in names:
+        genre = Genre(id=ids[name], name=name)
+        make_transient_to_detached(genre)
+        genres.append(db.session.merge(genre, load=False))
+    return genres
@@ -0,0 +1,333 @@
+"""In-process metrics registry exposed in Prometheus text format at /metrics.
+
+Per-endpoint request latency, template render and DB time histograms,
+request counts by status, in-flight requests and connection pool gauges.
+Updates take a per-registry lock, so they are safe from any thread.
+
+With METRICS_MULTIPROC_DIR set, each worker process writes its samples to a
+file there (every METRICS_FLUSH_SECONDS, and at exit) and /metrics
+merges the files of all workers: counters and histograms are summed across
+every file, including those of workers that have exited, gauges only across
+live workers (or their maximum, for the pool wait gauge). The directory must
+be emptied when the server (re)starts, as with any Prometheus multiprocess
+setup:
+
+    rm -rf /tmp/fyyur-metrics && mkdir /tmp/fyyur-metrics
+    METRICS_MULTIPROC_DIR=/tmp/fyyur-metrics gunicorn -w 4 app:app
+"""
+
+import atexit
+import glob
+import json
+import math
+import os
+import threading
+import time
+
+from flask import Response, current_app, g, request
+
+import db_pool
+import request_timing
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\""))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Metric:
+    kind = None
+    # How values from several processes are merged: "sum" over all files,
+    # "livesum"/"max" over the files of live processes only.
+    merge = "sum"
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = registry.lock
+        self._values = {}
+        registry.register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def dump(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def samples(self, values):
+        """Yields (name, labels, value) for dumped `values`."""
+
+        for key, value in values:
+            yield self.name, list(zip(self.labelnames, key)), value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, merge="livesum", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.merge = merge
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Values are [bucket counts..., +Inf count, sum] per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets=LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-1] += value
+
+    def samples(self, values):
+        for key, counts in values:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", labels + [("le", _format_value(bound))], cumulative
+            yield f"{self.name}_count", labels, cumulative
+            yield f"{self.name}_sum", labels, counts[-1]
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def dump(self):
+        return {name: metric.dump() for name, metric in self.metrics.items()}
+
+    def render(self, dumps):
+        """Prometheus text for a list of (pid or None, dump) pairs, merged."""
+
+        lines = []
+        for name, metric in self.metrics.items():
+            merged = {}
+            for pid, dump in dumps:
+                if metric.merge != "sum" and pid is not None and not _alive(pid):
+                    continue
+                for key, value in dump.get(name, ()):
+                    key = tuple(key)
+                    if key not in merged:
+                        merged[key] = value
+                    elif metric.kind == "histogram":
+                        merged[key] = [a + b for a, b in zip(merged[key], value)]
+                    elif metric.merge == "max":
+                        merged[key] = max(merged[key], value)
+                    else:
+                        merged[key] += value
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for sample, labels, value in metric.samples(sorted(merged.items())):
+                lines.append(f"{sample}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+registry = Registry()
+
+requests_total = Counter(
+    registry, "fyyur_http_requests_total", "HTTP requests by endpoint and status.",
+    ("endpoint", "method", "status"),
+)
+request_seconds = Histogram(
+    registry, "fyyur_http_request_duration_seconds", "Request latency by endpoint.",
+    ("endpoint",),
+)
+in_flight = Gauge(
+    registry, "fyyur_http_requests_in_flight", "Requests being handled.",
+)
+template_seconds = Histogram(
+    registry, "fyyur_template_render_seconds", "Template render time per request.",
+    ("endpoint",),
+)
+db_seconds = Histogram(
+    registry, "fyyur_request_db_seconds", "SQL time per request.",
+    ("endpoint",),
+)
+pool_connections = Gauge(
+    registry, "fyyur_db_pool_connections", "Pooled connections by state.",
+    ("engine", "state"),
+)
+pool_timeouts = Gauge(
+    registry, "fyyur_db_pool_checkout_timeouts", "Pool checkout timeouts so far.",
+    ("engine",),
+)
+pool_wait = Gauge(
+    registry, "fyyur_db_pool_checkout_wait_p95_seconds",
+    "95th percentile pool checkout wait over recent checkouts.",
+    ("engine",), merge="max",
+)
+
+
+def update_pool_gauges(app):
+    engines = [("primary", app.extensions["sqlalchemy"].db.engine)]
+    engines += [
+        (f"replica{i}", replica.engine)
+        for i, replica in enumerate(app.extensions["replicas"].replicas)
+    ]
+    for name, engine in engines:
+        status = db_pool.pool_status(engine)
+        for state in ("checked_out", "checked_in", "overflow"):
+            if state in status:
+                pool_connections.set(status[state], engine=name, state=state)
+        if "timeouts" in status:
+            pool_timeouts.set(status["timeouts"], engine=name)
+            pool_wait.set(status["wait_ms_p95"] / 1000, engine=name)
+
+
+class MultiprocessWriter:
+    """Writes this process's samples to `directory` every `interval` seconds
+    from a daemon thread, started on the first request after each fork."""
+
+    def __init__(self, app, directory, interval):
+        self.app = app
+        self.directory = directory
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock, self.app.app_context():
+            update_pool_gauges(self.app)
+            path = os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(registry.dump(), f)
+            os.replace(f"{path}.tmp", path)
+
+    def dumps(self):
+        dumps = []
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            pid = int(os.path.basename(path)[len("metrics-"):-len(".json")])
+            try:
+                with open(path) as f:
+                    dumps.append((pid, json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return dumps
+
+
+def init_app(app):
+    if not app.config["METRICS_ENABLED"]:
+        return
+    directory = app.config["METRICS_MULTIPROC_DIR"]
+    writer = None
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        writer = MultiprocessWriter(app, directory, app.config["METRICS_FLUSH_SECONDS"])
+        atexit.register(writer.flush)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        in_flight.inc()
+        if writer is not None:
+            writer.ensure_started()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get("metrics_started")
+        if started is None:
+            return response
+        endpoint = request.endpoint or "none"
+        request_seconds.observe(time.perf_counter() - started, endpoint=endpoint)
+        requests_total.inc(endpoint=endpoint, method=request.method,
+                           status=response.status_code)
+        stats = request_timing.current()
+        if stats is not None:
+            db_seconds.observe(stats.db_seconds, endpoint=endpoint)
+            if stats.template_seconds:
+                template_seconds.observe(stats.template_seconds, endpoint=endpoint)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        if g.pop("metrics_started", None) is not None:
+            in_flight.dec()
+
+    @app.route("/metrics")
+    def metrics():
+        if writer is None:
+            update_pool_gauges(current_app)
+            body = registry.render([(None, registry.dump())])
+        else:
+            writer.flush()
+            body = registry.render(writer.dumps())
+        return Response(body, content_type=CONTENT_TYPE)
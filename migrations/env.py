@@ -25,6 +25,25 @@ config.set_main_option(
     str(current_app.extensions['migrate'].db.engine.url).replace('%', '%%'))
 target_metadata = current_app.extensions['migrate'].db.metadata
 
+# Search objects are created by hand in revision 70e0df45cee7 and are not
+# mapped on the models; keep autogenerate from proposing to drop them.
+UNMAPPED_SEARCH_OBJECTS = {
+    'search_vector',
+    'ix_venue_search_vector',
+    'ix_venue_name_trgm',
+    'ix_venue_city_trgm',
+    'ix_artist_search_vector',
+    'ix_artist_name_trgm',
+    'ix_artist_city_trgm',
+    'ix_genre_name_trgm',
+}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (reflected and compare_to is None
+                and name in UNMAPPED_SEARCH_OBJECTS)
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -45,7 +64,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True
+        url=url, target_metadata=target_metadata, literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -77,6 +97,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=target_metadata,
             process_revision_directives=process_revision_directives,
+            include_object=include_object,
             **current_app.extensions['migrate'].configure_args
         )
 
@@ -0,0 +1,43 @@
+"""secondary indexes for the listing, detail and search queries
+
+Revision ID: 29d4b3097a93
+Revises: b8a2ea517a4d
+Create Date: 2026-10-18 15:02:44.187350
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '29d4b3097a93'
+down_revision = 'b8a2ea517a4d'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_show_venue_id_start_time', 'Show', ['venue_id', 'start_time']),
+    ('ix_show_artist_id_start_time', 'Show', ['artist_id', 'start_time']),
+    ('ix_show_start_time_id', 'Show', ['start_time', 'id']),
+    ('ix_venue_state_city_name_id', 'Venue', ['state', 'city', 'name', 'id']),
+    ('ix_artist_name_id', 'Artist', ['name', 'id']),
+    ('ix_venue_genre_venue_id', 'Venue_Genre', ['venue_id']),
+    ('ix_artist_genre_artist_id', 'Artist_Genre', ['artist_id']),
+]
+
+
+def upgrade():
+    # CONCURRENTLY keeps the tables writable while the indexes build; it
+    # cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns,
+                            postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table,
+                          postgresql_concurrently=True)
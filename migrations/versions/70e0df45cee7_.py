@@ -0,0 +1,51 @@
+"""full-text and trigram search for venues and artists
+
+Revision ID: 70e0df45cee7
+Revises: 5bdae972777e
+Create Date: 2026-10-18 10:12:41.538201
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '70e0df45cee7'
+down_revision = '5bdae972777e'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(city, '')), 'B')"
+)
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in ('Venue', 'Artist'):
+        op.execute(
+            f'ALTER TABLE "{table}" ADD COLUMN search_vector tsvector '
+            f'GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED'
+        )
+        op.create_index(f'ix_{table.lower()}_search_vector', table,
+                        ['search_vector'], postgresql_using='gin')
+        op.create_index(f'ix_{table.lower()}_name_trgm', table, ['name'],
+                        postgresql_using='gin',
+                        postgresql_ops={'name': 'gin_trgm_ops'})
+        op.create_index(f'ix_{table.lower()}_city_trgm', table, ['city'],
+                        postgresql_using='gin',
+                        postgresql_ops={'city': 'gin_trgm_ops'})
+    op.create_index('ix_genre_name_trgm', 'Genre', ['name'],
+                    postgresql_using='gin',
+                    postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_genre_name_trgm', table_name='Genre')
+    for table in ('Artist', 'Venue'):
+        op.drop_index(f'ix_{table.lower()}_city_trgm', table_name=table)
+        op.drop_index(f'ix_{table.lower()}_name_trgm', table_name=table)
+        op.drop_index(f'ix_{table.lower()}_search_vector', table_name=table)
+        op.drop_column(table, 'search_vector')
@@ -0,0 +1,48 @@
+"""merge duplicate genres and make Genre.name unique
+
+Revision ID: 96965265a671
+Revises: 70e0df45cee7
+Create Date: 2026-10-18 11:03:27.904511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '96965265a671'
+down_revision = '70e0df45cee7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Every duplicate name is folded into its lowest id; association rows are
+    # re-pointed first so no venue or artist loses a genre.
+    op.execute('''
+        CREATE TEMPORARY TABLE genre_merge AS
+        SELECT id, min(id) OVER (PARTITION BY name) AS keep
+        FROM "Genre"
+        WHERE name IS NOT NULL
+    ''')
+    op.execute('DELETE FROM genre_merge WHERE id = keep')
+    for table, owner in (('Venue_Genre', 'venue_id'),
+                         ('Artist_Genre', 'artist_id')):
+        op.execute(f'''
+            INSERT INTO "{table}" (genre_id, {owner})
+            SELECT DISTINCT m.keep, t.{owner}
+            FROM "{table}" t JOIN genre_merge m ON t.genre_id = m.id
+            ON CONFLICT DO NOTHING
+        ''')
+        op.execute(f'''
+            DELETE FROM "{table}"
+            WHERE genre_id IN (SELECT id FROM genre_merge)
+        ''')
+    op.execute('DELETE FROM "Genre" WHERE id IN (SELECT id FROM genre_merge)')
+    op.execute('DROP TABLE genre_merge')
+
+    op.create_index(op.f('ix_Genre_name'), 'Genre', ['name'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_Genre_name'), table_name='Genre')
@@ -0,0 +1,29 @@
+"""index ShowArchive by start_time for the /shows date ranges
+
+Revision ID: a6e2d8f4c913
+Revises: f3b9c1d7a2e4
+Create Date: 2026-10-18 21:48:19.604772
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e2d8f4c913'
+down_revision = 'f3b9c1d7a2e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY keeps the archive writable while the index builds.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_show_archive_start_time_id', 'ShowArchive',
+                        ['start_time', 'id'], postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_show_archive_start_time_id', table_name='ShowArchive',
+                      postgresql_concurrently=True)
@@ -0,0 +1,55 @@
+"""denormalized upcoming/past show counters on Venue and Artist
+
+Revision ID: a98ce71f87c9
+Revises: 96965265a671
+Create Date: 2026-10-18 11:48:52.317094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a98ce71f87c9'
+down_revision = '96965265a671'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Show', sa.Column('counted_upcoming', sa.Boolean(),
+                                    server_default='false', nullable=False))
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(),
+                                       server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(),
+                                       server_default='0', nullable=False))
+
+    # start_time is a naive local timestamp, like the app's datetime.now().
+    op.execute('UPDATE "Show" SET counted_upcoming = start_time > LOCALTIMESTAMP')
+    for table, owner in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        op.execute(f'''
+            UPDATE "{table}" t
+            SET upcoming_shows_count = c.upcoming,
+                past_shows_count = c.past
+            FROM (
+                SELECT {owner} AS id,
+                       count(*) FILTER (WHERE counted_upcoming) AS upcoming,
+                       count(*) FILTER (WHERE NOT counted_upcoming) AS past
+                FROM "Show"
+                GROUP BY {owner}
+            ) c
+            WHERE t.id = c.id
+        ''')
+
+    op.create_index('ix_show_counted_upcoming_start_time', 'Show',
+                    ['start_time'],
+                    postgresql_where=sa.text('counted_upcoming'))
+
+
+def downgrade():
+    op.drop_index('ix_show_counted_upcoming_start_time', table_name='Show')
+    for table in ('Artist', 'Venue'):
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
+    op.drop_column('Show', 'counted_upcoming')
@@ -0,0 +1,34 @@
+"""updated_at columns on Venue, Artist and Show
+
+Revision ID: b8a2ea517a4d
+Revises: a98ce71f87c9
+Create Date: 2026-10-18 13:20:05.612877
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8a2ea517a4d'
+down_revision = 'a98ce71f87c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist', 'Show'):
+        # Backfill existing rows with the migration time, then leave
+        # maintenance to the models.
+        op.add_column(table, sa.Column(
+            'updated_at', sa.DateTime(), nullable=False,
+            server_default=sa.text("(now() AT TIME ZONE 'utc')")))
+        op.alter_column(table, 'updated_at', server_default=None)
+        op.create_index(op.f(f'ix_{table}_updated_at'), table, ['updated_at'],
+                        unique=False)
+
+
+def downgrade():
+    for table in ('Show', 'Artist', 'Venue'):
+        op.drop_index(op.f(f'ix_{table}_updated_at'), table_name=table)
+        op.drop_column(table, 'updated_at')
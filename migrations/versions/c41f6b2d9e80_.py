@@ -0,0 +1,133 @@
+"""partition Show by month on start_time
+
+Revision ID: c41f6b2d9e80
+Revises: 29d4b3097a93
+Create Date: 2026-10-18 17:40:12.904215
+
+Online: a trigger mirrors writes on the old table into the partitioned one
+while existing rows are copied in batches (each committed on its own), and
+the tables are swapped under a short exclusive lock at the end. Partitions
+are created from the month of the oldest show to SHOW_PARTITION_MONTHS_AHEAD
+months ahead; later months are added by ``flask create-partitions``.
+
+"""
+import os
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f6b2d9e80'
+down_revision = '29d4b3097a93'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 50000
+MONTHS_AHEAD = int(os.environ.get('SHOW_PARTITION_MONTHS_AHEAD', 12))
+
+# (final name, columns, where) of the indexes on the partitioned table; they
+# are built under a temporary name while the old table still owns the name.
+INDEXES = [
+    ('ix_show_venue_id_start_time', ['venue_id', 'start_time'], None),
+    ('ix_show_artist_id_start_time', ['artist_id', 'start_time'], None),
+    ('ix_show_start_time_id', ['start_time', 'id'], None),
+    ('ix_Show_updated_at', ['updated_at'], None),
+    ('ix_show_counted_upcoming_start_time', ['start_time'], 'counted_upcoming'),
+]
+
+SYNC_FUNCTION = '''
+CREATE FUNCTION show_partition_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM "Show_partitioned" WHERE id = OLD.id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO "Show_partitioned" SELECT NEW.*;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+'''
+
+
+def _months(first, last):
+    month = datetime(first.year, first.month, 1)
+    while month <= last:
+        following = datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+        yield month, following
+        month = following
+
+
+def _create_indexes(table, suffix=''):
+    for name, columns, where in INDEXES:
+        op.create_index(name + suffix, table, columns,
+                        postgresql_where=sa.text(where) if where else None)
+
+
+def upgrade():
+    conn = op.get_bind()
+
+    op.execute('CREATE TABLE "Show_partitioned" (LIKE "Show" INCLUDING DEFAULTS) '
+               'PARTITION BY RANGE (start_time)')
+    op.execute('ALTER TABLE "Show_partitioned" '
+               'ADD CONSTRAINT "Show_partitioned_pkey" PRIMARY KEY (id, start_time)')
+    op.create_foreign_key('Show_partitioned_artist_id_fkey', 'Show_partitioned',
+                          'Artist', ['artist_id'], ['id'])
+    op.create_foreign_key('Show_partitioned_venue_id_fkey', 'Show_partitioned',
+                          'Venue', ['venue_id'], ['id'])
+    _create_indexes('Show_partitioned', '_new')
+
+    now = datetime.now()
+    oldest = conn.execute(sa.text('SELECT min(start_time) FROM "Show"')).scalar() or now
+    last = datetime(now.year + (now.month + MONTHS_AHEAD - 1) // 12,
+                    (now.month + MONTHS_AHEAD - 1) % 12 + 1, 1)
+    for month, following in _months(min(oldest, now), last):
+        op.execute(f'CREATE TABLE "Show_p{month:%Y_%m}" PARTITION OF "Show_partitioned" '
+                   f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')")
+    op.execute('CREATE TABLE "Show_default" PARTITION OF "Show_partitioned" DEFAULT')
+
+    op.execute(SYNC_FUNCTION)
+    op.execute('CREATE TRIGGER show_partition_sync AFTER INSERT OR UPDATE OR DELETE '
+               'ON "Show" FOR EACH ROW EXECUTE FUNCTION show_partition_sync()')
+
+    # Rows written from here on are mirrored by the trigger; copy the rest.
+    # FOR SHARE makes a concurrent update wait for the batch, so the
+    # trigger's copy of the row always wins.
+    with op.get_context().autocommit_block():
+        last_id = conn.execute(sa.text('SELECT coalesce(max(id), 0) FROM "Show"')).scalar()
+        for low in range(0, last_id, BATCH_SIZE):
+            conn.execute(
+                sa.text('INSERT INTO "Show_partitioned" '
+                        'SELECT * FROM "Show" WHERE id > :low AND id <= :high FOR SHARE '
+                        'ON CONFLICT DO NOTHING'),
+                {'low': low, 'high': low + BATCH_SIZE},
+            )
+        conn.execute(sa.text('ANALYZE "Show_partitioned"'))
+
+    op.execute('LOCK TABLE "Show" IN ACCESS EXCLUSIVE MODE')
+    op.execute('DROP TRIGGER show_partition_sync ON "Show"')
+    op.execute('DROP FUNCTION show_partition_sync()')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show_partitioned".id')
+    op.drop_table('Show')
+    op.rename_table('Show_partitioned', 'Show')
+    op.execute('ALTER TABLE "Show" RENAME CONSTRAINT "Show_partitioned_pkey" TO "Show_pkey"')
+    for column in ('artist_id', 'venue_id'):
+        op.execute(f'ALTER TABLE "Show" RENAME CONSTRAINT '
+                   f'"Show_partitioned_{column}_fkey" TO "Show_{column}_fkey"')
+    for name, _, _ in INDEXES:
+        op.execute(f'ALTER INDEX "{name}_new" RENAME TO "{name}"')
+
+
+def downgrade():
+    op.execute('CREATE TABLE "Show_unpartitioned" (LIKE "Show" INCLUDING DEFAULTS)')
+    op.execute('INSERT INTO "Show_unpartitioned" SELECT * FROM "Show"')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show_unpartitioned".id')
+    op.drop_table('Show')  # drops every partition
+    op.rename_table('Show_unpartitioned', 'Show')
+    op.create_primary_key('Show_pkey', 'Show', ['id'])
+    op.create_foreign_key('Show_artist_id_fkey', 'Show', 'Artist', ['artist_id'], ['id'])
+    op.create_foreign_key('Show_venue_id_fkey', 'Show', 'Venue', ['venue_id'], ['id'])
+    _create_indexes('Show')
@@ -0,0 +1,39 @@
+"""ShowArchive table for archived past shows
+
+Revision ID: e7d3a0c5b219
+Revises: c41f6b2d9e80
+Create Date: 2026-10-18 19:12:37.481903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7d3a0c5b219'
+down_revision = 'c41f6b2d9e80'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ShowArchive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ),
+    sa.ForeignKeyConstraint(['venue_id'], ['Venue.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_show_archive_venue_id_start_time', 'ShowArchive',
+                    ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_show_archive_artist_id_start_time', 'ShowArchive',
+                    ['artist_id', 'start_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_show_archive_artist_id_start_time', table_name='ShowArchive')
+    op.drop_index('ix_show_archive_venue_id_start_time', table_name='ShowArchive')
+    op.drop_table('ShowArchive')
@@ -0,0 +1,48 @@
+"""make the listing sort keys NOT NULL
+
+Revision ID: f3b9c1d7a2e4
+Revises: e7d3a0c5b219
+Create Date: 2026-10-18 21:05:48.316027
+
+The /venues and /artists listings page by a row comparison on (state, city,
+name, id) and (name, id); a NULL in a key drops the row from every page
+after the first. Every write path already requires these columns, so the
+few NULLs left from older data become empty strings.
+
+Online: each column first gets a NOT VALID check constraint, validated
+without blocking writes, which lets SET NOT NULL skip its full-table scan
+under the exclusive lock.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9c1d7a2e4'
+down_revision = 'e7d3a0c5b219'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = [
+    ('Venue', 'state'),
+    ('Venue', 'city'),
+    ('Venue', 'name'),
+    ('Artist', 'name'),
+]
+
+
+def upgrade():
+    for table, column in COLUMNS:
+        constraint = f'{table}_{column}_not_null'
+        op.execute(f'UPDATE "{table}" SET "{column}" = \'\' WHERE "{column}" IS NULL')
+        op.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{constraint}" '
+                   f'CHECK ("{column}" IS NOT NULL) NOT VALID')
+        op.execute(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{constraint}"')
+        op.alter_column(table, column, nullable=False)
+        op.drop_constraint(constraint, table, type_='check')
+
+
+def downgrade():
+    for table, column in COLUMNS:
+        op.alter_column(table, column, nullable=True)
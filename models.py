@@ -4,16 +4,18 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Boolean,
+    text,
 )
 
 
 class Genre(db.Model):
     __tablename__ = "Genre"
     id = Column(Integer, primary_key=True)
-    name = Column(String)
+    name = Column(String, unique=True, index=True)
 
 
 # Artist:Genre :: N:N
@@ -21,6 +23,7 @@ artist_genre = db.Table(
     "Artist_Genre",
     Column("genre_id", Integer, ForeignKey("Genre.id"), primary_key=True),
     Column("artist_id", Integer, ForeignKey("Artist.id"), primary_key=True),
+    Index("ix_artist_genre_artist_id", "artist_id"),
 )
 
 # Venue:Genre :: N:N
@@ -28,15 +31,16 @@ venue_genre = db.Table(
     "Venue_Genre",
     Column("genre_id", Integer, ForeignKey("Genre.id"), primary_key=True),
     Column("venue_id", Integer, ForeignKey("Venue.id"), primary_key=True),
+    Index("ix_venue_genre_venue_id", "venue_id"),
 )
 
 
 class Venue(db.Model):
     __tablename__ = "Venue"
     id = Column(Integer, primary_key=True)
-    name = Column(String)
-    city = Column(String(120))
-    state = Column(String(120))
+    name = Column(String, nullable=False)
+    city = Column(String(120), nullable=False)
+    state = Column(String(120), nullable=False)
     address = Column(String(120))
     phone = Column(String(120))
     image_link = Column(String(500))
@@ -44,12 +48,21 @@ class Venue(db.Model):
     website = Column(String(120))
     seeking_talent = Column(Boolean, default=False)
     seeking_description = Column(String(120))
+    # Denormalized show counters, maintained by counters.py.
+    upcoming_shows_count = Column(Integer, nullable=False, default=0, server_default="0")
+    past_shows_count = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(
+        DateTime, nullable=False, index=True, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     genres = db.relationship(
         "Genre", secondary=venue_genre, backref=db.backref("venues")
     )
     shows = db.relationship("Show", backref="Venue", lazy=True)
 
+    # Keyset order of the /venues listing.
+    __table_args__ = (Index("ix_venue_state_city_name_id", "state", "city", "name", "id"),)
+
     def __repr__(self):
         return f"<Venue {self.id} {self.name}>"
 
@@ -57,7 +70,7 @@ class Venue(db.Model):
 class Artist(db.Model):
     __tablename__ = "Artist"
     id = Column(Integer, primary_key=True)
-    name = Column(String)
+    name = Column(String, nullable=False)
     city = Column(String(120))
     state = Column(String(120))
     phone = Column(String(120))
@@ -66,22 +79,74 @@ class Artist(db.Model):
     website = Column(String(120))
     seeking_venue = Column(Boolean, default=False)
     seeking_description = Column(String(120))
+    # Denormalized show counters, maintained by counters.py.
+    upcoming_shows_count = Column(Integer, nullable=False, default=0, server_default="0")
+    past_shows_count = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(
+        DateTime, nullable=False, index=True, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     genres = db.relationship(
         "Genre", secondary=artist_genre, backref=db.backref("Artists")
     )
     shows = db.relationship("Show", backref="Artist", lazy=True)
 
+    # Keyset order of the /artists listing.
+    __table_args__ = (Index("ix_artist_name_id", "name", "id"),)
+
     def __repr__(self):
         return f"<Artist {self.id} {self.name}>"
 
 
 class Show(db.Model):
+    # On PostgreSQL the table is range-partitioned by month on start_time
+    # (migration c41f6b2d9e80, see partitions.py), so the partition key is
+    # part of the primary key; id alone stays unique through its sequence.
     __tablename__ = "Show"
-    id = Column(Integer, primary_key=True)
-    start_time = Column(DateTime, nullable=False, default=datetime.utcnow)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    start_time = Column(DateTime, primary_key=True, default=datetime.utcnow)
     artist_id = Column(Integer, ForeignKey("Artist.id"), nullable=False)
     venue_id = Column(Integer, ForeignKey("Venue.id"), nullable=False)
+    # True while the show is counted in the upcoming counters of its venue and
+    # artist; cleared by counters.rollover_shows() once start_time has passed.
+    counted_upcoming = Column(Boolean, nullable=False, default=False, server_default="false")
+    updated_at = Column(
+        DateTime, nullable=False, index=True, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    __table_args__ = (
+        # Detail pages: one entity's shows in start_time order.
+        Index("ix_show_venue_id_start_time", "venue_id", "start_time"),
+        Index("ix_show_artist_id_start_time", "artist_id", "start_time"),
+        # Keyset order of the /shows listing.
+        Index("ix_show_start_time_id", "start_time", "id"),
+        Index(
+            "ix_show_counted_upcoming_start_time",
+            "start_time",
+            postgresql_where=text("counted_upcoming"),
+        ),
+    )
 
     def __repr__(self):
         return f"<Show {self.id} {self.start_time} artist_id={self.artist_id} venue_id={self.venue_id}>"
+
+
+class ShowArchive(db.Model):
+    # Shows that started more than SHOW_ARCHIVE_AFTER_DAYS ago, moved out of
+    # Show by archive.archive_shows(). Append-only; read together with Show
+    # via archive.all_shows().
+    __tablename__ = "ShowArchive"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    start_time = Column(DateTime, nullable=False)
+    artist_id = Column(Integer, ForeignKey("Artist.id"), nullable=False)
+    venue_id = Column(Integer, ForeignKey("Venue.id"), nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_show_archive_venue_id_start_time", "venue_id", "start_time"),
+        Index("ix_show_archive_artist_id_start_time", "artist_id", "start_time"),
+        Index("ix_show_archive_start_time_id", "start_time", "id"),
+    )
+
+    def __repr__(self):
+        return f"<ShowArchive {self.id} {self.start_time} artist_id={self.artist_id} venue_id={self.venue_id}>"
@@ -0,0 +1,92 @@
+"""In-process trigram inverted index for substring name search.
+
+Used by search.py when SEARCH_INDEX is "memory" so deployments without
+PostgreSQL extensions can answer ``%term%`` lookups without scanning the
+table. Each worker keeps its own copy, built once at startup; search.py
+keeps it current from the rows' updated_at (see search.changes()).
+"""
+
+import threading
+
+N = 3
+
+
+def _grams(text):
+    return {text[i:i + N] for i in range(len(text) - N + 1)}
+
+
+class NGramIndex:
+    """Maps lower-cased trigrams to the set of ids whose name contains them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = {}
+        self._postings = {}
+        self.ready = False
+        # Newest updated_at indexed so far; maintained by search.py.
+        self.last_seen = None
+
+    def __len__(self):
+        return len(self._names)
+
+    def build(self, rows):
+        """Replaces the index contents with (id, name) pairs from `rows`."""
+
+        names = {}
+        postings = {}
+        for id_, name in rows:
+            folded = (name or "").lower()
+            names[id_] = (folded, name)
+            for gram in _grams(folded):
+                postings.setdefault(gram, set()).add(id_)
+
+        with self._lock:
+            self._names = names
+            self._postings = postings
+            self.ready = True
+
+    def _discard(self, id_):
+        entry = self._names.pop(id_, None)
+        if entry is None:
+            return
+        for gram in _grams(entry[0]):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(id_)
+                if not ids:
+                    del self._postings[gram]
+
+    def add(self, id_, name):
+        """Inserts or replaces the name indexed under `id_`."""
+
+        folded = (name or "").lower()
+        with self._lock:
+            self._discard(id_)
+            self._names[id_] = (folded, name)
+            for gram in _grams(folded):
+                self._postings.setdefault(gram, set()).add(id_)
+
+    def remove(self, id_):
+        with self._lock:
+            self._discard(id_)
+
+    def search(self, term):
+        """Returns ids whose name contains `term`, ordered by name then id."""
+
+        term = term.lower()
+        with self._lock:
+            if len(term) < N:
+                candidates = self._names.keys()
+            else:
+                postings = sorted(
+                    (self._postings.get(gram, ()) for gram in _grams(term)),
+                    key=len,
+                )
+                candidates = set(postings[0]).intersection(*postings[1:])
+            matches = [
+                (self._names[id_][1] or "", id_)
+                for id_ in candidates
+                if term in self._names[id_][0]
+            ]
+        matches.sort()
+        return [id_ for _, id_ in matches]
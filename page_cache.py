@@ -0,0 +1,122 @@
+"""Rendered-fragment cache for the venue and artist detail pages.
+
+Entries are keyed by ("venue" | "artist", id). A render reads the key's
+version before it starts and set() refuses the fragment if invalidate() has
+bumped the version since, so a render racing with a write can never store a
+stale fragment. Only the maxsize most recently bumped versions are kept; a
+key without one has the version of the newest one dropped, which keeps
+every version a render may still compare against moving forward. Entries
+also expire
+after DETAIL_CACHE_TTL seconds or when the next upcoming show starts,
+whichever comes first, since that moves a show from upcoming to past.
+
+The cache is per process and invalidate() only reaches the worker that
+handled the write. Entries therefore also carry the database stamp read
+before rendering (conditional.detail_stamp(), the same state the page's
+ETag is derived from); get() drops an entry whose stamp no longer matches,
+so no worker serves an old fragment under a new ETag.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from app import app, db
+from archive import all_shows
+
+
+class FragmentCache:
+    """Bounded, thread-safe LRU of rendered fragments with per-entry expiry."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Recently bumped versions, oldest first; keys without one are at
+        # _floor. Versions come from _counter, so they only ever increase.
+        self._versions = OrderedDict()
+        self._counter = 0
+        self._floor = 0
+
+    def version(self, key):
+        with self._lock:
+            return self._versions.get(key, self._floor)
+
+    def get(self, key, stamp=None):
+        """Returns the value cached for `key` if it was stored with `stamp`."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry_stamp, expires_at, value = entry
+            if entry_stamp != stamp or expires_at <= datetime.now():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, version, value, expires_at=None, stamp=None):
+        """Stores `value` unless `key` was invalidated after `version` was read."""
+
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        deadline = datetime.now() + timedelta(seconds=self.ttl)
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+
+        with self._lock:
+            if version != self._versions.get(key, self._floor):
+                return
+            self._entries[key] = (stamp, deadline, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._counter += 1
+                self._versions[key] = self._counter
+                self._versions.move_to_end(key)
+                self._entries.pop(key, None)
+            while len(self._versions) > max(self.maxsize, 0):
+                _, dropped = self._versions.popitem(last=False)
+                self._floor = dropped
+
+    def clear(self):
+        with self._lock:
+            self._counter += 1
+            self._floor = self._counter
+            self._versions.clear()
+            self._entries.clear()
+
+
+detail_cache = FragmentCache(
+    maxsize=app.config["DETAIL_CACHE_SIZE"], ttl=app.config["DETAIL_CACHE_TTL"]
+)
+
+
+def invalidate_venue(venue_id):
+    """Drops a venue page and the artist pages that list the venue."""
+
+    shows = all_shows()
+    artist_ids = db.session.query(shows.c.artist_id).filter(
+        shows.c.venue_id == venue_id
+    ).distinct()
+    detail_cache.invalidate(
+        ("venue", venue_id), *(("artist", id_) for (id_,) in artist_ids)
+    )
+
+
+def invalidate_artist(artist_id):
+    """Drops an artist page and the venue pages that list the artist."""
+
+    shows = all_shows()
+    venue_ids = db.session.query(shows.c.venue_id).filter(
+        shows.c.artist_id == artist_id
+    ).distinct()
+    detail_cache.invalidate(
+        ("artist", artist_id), *(("venue", id_) for (id_,) in venue_ids)
+    )
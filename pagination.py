@@ -0,0 +1,137 @@
+"""Keyset (seek) pagination for the listing routes.
+
+Pages are addressed by an opaque cursor holding the sort key of the row on
+the page boundary, so fetching a deep page costs the same index seek as the
+first one instead of an ever-growing OFFSET scan.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+class Page:
+    """One page of rows plus the cursors pointing at its neighbours."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def _to_json(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _from_json(column, value):
+    """Converts a decoded cursor value back for `column`. Raises TypeError or
+    ValueError if it cannot be a value of the column's type."""
+
+    if value is None:
+        return value
+    python_type = column.type.python_type
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise TypeError(f"Expected a datetime string, got {value!r}")
+        return datetime.fromisoformat(value)
+    # bool is an int to isinstance(), but never a key value.
+    if not isinstance(value, python_type) or isinstance(value, bool):
+        raise TypeError(f"Expected {python_type.__name__}, got {value!r}")
+    return value
+
+
+def encode_cursor(direction, values):
+    """Packs a direction ("n" or "p") and a sort key into a URL-safe token."""
+
+    payload = json.dumps([direction, [_to_json(v) for v in values]])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, columns):
+    """Inverse of encode_cursor(). Raises ValueError on a malformed token."""
+
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError(f"Malformed cursor: {token!r}")
+
+    if (
+        direction not in ("n", "p")
+        or not isinstance(values, list)
+        or len(values) != len(columns)
+    ):
+        raise ValueError(f"Malformed cursor: {token!r}")
+    try:
+        return direction, [_from_json(c, v) for c, v in zip(columns, values)]
+    except (TypeError, ValueError):
+        raise ValueError(f"Malformed cursor: {token!r}")
+
+
+def seek(query, columns, cursor=None, per_page=50):
+    """Applies the keyset filter, ordering and limit for `cursor` to `query`
+    (a Query or a select()). Returns (query, direction, values) for page_of().
+    """
+
+    direction, values = "n", None
+    if cursor:
+        direction, values = decode_cursor(cursor, columns)
+
+    if direction == "n":
+        if values is not None:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+        query = query.order_by(*columns)
+    else:
+        query = query.filter(tuple_(*columns) < tuple_(*values))
+        query = query.order_by(*[column.desc() for column in columns])
+
+    return query.limit(per_page + 1), direction, values
+
+
+def page_of(rows, columns, direction, values, per_page=50):
+    """Builds the Page for the rows fetched by a seek() query."""
+
+    keys = [column.key for column in columns]
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == "p":
+        rows.reverse()
+
+    def key_of(row):
+        return [getattr(row, key) for key in keys]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == "p" or has_more:
+            next_cursor = encode_cursor("n", key_of(rows[-1]))
+        if values is not None and (direction == "n" or has_more):
+            prev_cursor = encode_cursor("p", key_of(rows[0]))
+
+    return Page(rows, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+def paginate(query, columns, cursor=None, per_page=50, execute=None):
+    """Returns a Page of `query` ordered ascending by `columns`.
+
+    The last column must be unique (normally the primary key) so the sort key
+    is a total order. Each selected row must expose the key columns as
+    attributes of the same name. A select() needs `execute` (e.g.
+    db.session.execute) to run it; a Query runs itself.
+    """
+
+    query, direction, values = seek(query, columns, cursor, per_page)
+    rows = execute(query).all() if execute is not None else query.all()
+    return page_of(rows, columns, direction, values, per_page)
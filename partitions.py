@@ -0,0 +1,113 @@
+"""Monthly range partitions of the Show table on PostgreSQL.
+
+Migration c41f6b2d9e80 turns Show into a table partitioned by month on
+start_time, with a default partition for shows outside every month that has
+its own partition. ensure_partitions() creates the partitions for the coming
+months ahead of time (``flask create-partitions``, run from cron alongside
+``flask rollover-shows``). When a month's rows already sit in the default
+partition they are moved into the new partition in the same transaction.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import app, db
+
+PARENT = "Show"
+DEFAULT_PARTITION = "Show_default"
+# Any constant; serializes concurrent ensure_partitions() runs.
+_LOCK_ID = 0x5F5E0C
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def next_month(value):
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"Show_p{month:%Y_%m}"
+
+
+def is_partitioned():
+    if db.engine.dialect.name != "postgresql":
+        return False
+    return bool(
+        db.session.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :parent AND pg_table_is_visible(c.oid)"
+            ),
+            {"parent": PARENT},
+        ).scalar()
+    )
+
+
+def existing_partitions():
+    return set(
+        db.session.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :parent AND pg_table_is_visible(p.oid)"
+            ),
+            {"parent": PARENT},
+        ).scalars()
+    )
+
+
+def _create_partition(month):
+    name, bounds = partition_name(month), {"lo": month, "hi": next_month(month)}
+    db.session.execute(
+        text(f'CREATE TABLE "{name}" (LIKE "{PARENT}" INCLUDING DEFAULTS)')
+    )
+    moved = db.session.execute(
+        text(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+            "WHERE start_time >= :lo AND start_time < :hi RETURNING *) "
+            f'INSERT INTO "{name}" SELECT * FROM moved'
+        ),
+        bounds,
+    ).rowcount
+    # Literal bounds: partition bounds cannot be bind parameters.
+    db.session.execute(
+        text(
+            f'ALTER TABLE "{PARENT}" ATTACH PARTITION "{name}" '
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month(month):%Y-%m-%d}')"
+        )
+    )
+    return moved
+
+
+def ensure_partitions(months_ahead=None, now=None):
+    """Creates the partitions from the current month to `months_ahead` months
+    ahead that do not exist yet. Returns [(partition, rows moved from the
+    default partition)] for the partitions created.
+    """
+
+    if not is_partitioned():
+        return []
+    if months_ahead is None:
+        months_ahead = app.config["SHOW_PARTITION_MONTHS_AHEAD"]
+
+    created = []
+    try:
+        db.session.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _LOCK_ID})
+        existing = existing_partitions()
+        month = month_start(now or datetime.now())
+        for _ in range(months_ahead + 1):
+            if partition_name(month) not in existing:
+                created.append((partition_name(month), _create_partition(month)))
+            month = next_month(month)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.close()
+    return created
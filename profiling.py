@@ -0,0 +1,198 @@
+"""Opt-in sampling profiler for individual requests.
+
+A request is profiled when it carries a valid ``X-Profile`` header (a token
+from ``flask profile-token``, signed with SECRET_KEY) or is picked at random
+with probability PROFILE_SAMPLE_RATE. A background thread then samples the
+request thread's stack every PROFILE_INTERVAL_MS while the view and template
+run, so the request itself pays nothing per function call. Two files are
+written to PROFILE_DIR per profiled request, named after the endpoint and
+wall time:
+
+    <time>-<endpoint>-<ms>ms-<pid>.collapsed   one "a;b;c count" line per
+                                               stack, for flamegraph.pl or
+                                               speedscope
+    <time>-<endpoint>-<ms>ms-<pid>.pstats      the same samples as pstats
+                                               (sample counts, not calls)
+
+``flask profile-report`` merges the dumps of many requests.
+"""
+
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+HEADER = "X-Profile"
+_SALT = "fyyur-profile"
+
+
+def _serializer(app):
+    return URLSafeTimedSerializer(app.config["SECRET_KEY"], salt=_SALT)
+
+
+def make_token(app):
+    return _serializer(app).dumps("profile")
+
+
+def _valid_token(app, token):
+    try:
+        _serializer(app).loads(token, max_age=app.config["PROFILE_TOKEN_MAX_AGE"])
+    except BadSignature:
+        return False
+    return True
+
+
+def _frame_key(code):
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+class StackSampler:
+    """Samples the stack of thread `thread_id` every `interval` seconds."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_key(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def collapsed(self):
+        """Returns {"file:func;file:func;...": samples}, root first."""
+
+        lines = Counter()
+        for stack, count in self.stacks.items():
+            names = ";".join(
+                f"{os.path.basename(filename)}:{name}" for filename, _, name in stack
+            )
+            lines[names] += count
+        return lines
+
+    def pstats_dict(self):
+        """Builds a pstats-compatible stats dict: call counts are sample counts,
+        times are samples multiplied by the interval."""
+
+        stats = {}
+
+        def entry(key):
+            if key not in stats:
+                stats[key] = [0, 0, 0.0, 0.0, {}]
+            return stats[key]
+
+        for stack, count in self.stacks.items():
+            seconds = count * self.interval
+            entry(stack[-1])[2] += seconds
+            for key in dict.fromkeys(stack):
+                row = entry(key)
+                row[0] += count
+                row[1] += count
+                row[3] += seconds
+            for caller, callee in dict.fromkeys(zip(stack, stack[1:])):
+                callers = entry(callee)[4]
+                nc, cc, tt, ct = callers.get(caller, (0, 0, 0.0, 0.0))
+                self_time = seconds if callee == stack[-1] else 0.0
+                callers[caller] = (nc + count, cc + count, tt + self_time, ct + seconds)
+        return {key: tuple(row) for key, row in stats.items()}
+
+
+class _SampledProfile:
+    """Adapter letting pstats.Stats load a sampled stats dict."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def write_dump(directory, sampler, endpoint, seconds):
+    os.makedirs(directory, exist_ok=True)
+    stem = (
+        f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{endpoint.replace('.', '_')}-"
+        f"{seconds * 1000:.0f}ms-{os.getpid()}"
+    )
+    path = os.path.join(directory, stem)
+    with open(f"{path}.collapsed", "w") as f:
+        for stack, count in sorted(sampler.collapsed().items()):
+            f.write(f"{stack} {count}\n")
+    pstats.Stats(_SampledProfile(sampler.pstats_dict())).dump_stats(f"{path}.pstats")
+    return stem
+
+
+def read_collapsed(paths):
+    stacks = Counter()
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack:
+                    stacks[stack] += int(count)
+    return stacks
+
+
+def dump_paths(directory, endpoint=None):
+    """Returns the dump stems in `directory`, optionally for one endpoint."""
+
+    stems = sorted(
+        name[: -len(".collapsed")]
+        for name in os.listdir(directory)
+        if name.endswith(".collapsed")
+    )
+    if endpoint:
+        stems = [stem for stem in stems if stem.split("-")[1] == endpoint.replace(".", "_")]
+    return [os.path.join(directory, stem) for stem in stems]
+
+
+def init_app(app):
+    directory = app.config["PROFILE_DIR"]
+    rate = app.config["PROFILE_SAMPLE_RATE"]
+    interval = app.config["PROFILE_INTERVAL_MS"] / 1000
+
+    @app.before_request
+    def start_profiler():
+        token = request.headers.get(HEADER)
+        if not (token and _valid_token(app, token)) and not (rate and random.random() < rate):
+            return
+        g.profiler = StackSampler(threading.get_ident(), interval)
+        g.profile_started = time.perf_counter()
+        g.profiler.start()
+
+    @app.after_request
+    def write_profile(response):
+        sampler = g.pop("profiler", None)
+        if sampler is None:
+            return response
+        sampler.stop()
+        seconds = time.perf_counter() - g.pop("profile_started")
+        stem = write_dump(directory, sampler, request.endpoint or "none", seconds)
+        response.headers[HEADER] = stem
+        return response
+
+    @app.teardown_request
+    def stop_profiler(exc):
+        sampler = g.pop("profiler", None)
+        if sampler is not None:
+            sampler.stop()
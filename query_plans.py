@@ -0,0 +1,163 @@
+"""EXPLAIN-based regression check for the queries each route issues.
+
+Every route in ROUTES is driven through the Flask test client while the
+SQL it sends to the primary and the replicas is recorded; each SELECT is
+then run through ``EXPLAIN (FORMAT JSON)`` on the primary and the plan is
+searched for sequential scans of the guarded tables. Run it against a seeded
+PostgreSQL database (plans on a near-empty table are seq scans whatever the
+indexes), either directly or as part of the test suite:
+
+    flask check-plans [--save plans/]
+    python -m pytest tests/test_query_plans.py
+"""
+
+import json
+import os
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import app, db
+from models import Artist, Show, ShowArchive, Venue
+from page_cache import detail_cache
+
+GUARDED = ("Show",)
+MIN_SHOWS = 10000
+# ShowArchive is only guarded once it holds enough rows for the planner to
+# prefer its indexes; a new or small archive is rightly seq-scanned.
+MIN_ARCHIVED_SHOWS = MIN_SHOWS
+
+ROUTES = [
+    ("GET", "/venues", None),
+    ("GET", "/artists", None),
+    ("GET", "/shows", None),
+    ("GET", "/shows?from=2000-01-01", None),
+    ("GET", "/venues/{venue_id}", None),
+    ("GET", "/artists/{artist_id}", None),
+    ("POST", "/venues/search", {"search_term": "the"}),
+    ("POST", "/artists/search", {"search_term": "the"}),
+    ("GET", "/api/v1/venues", None),
+    ("GET", "/api/v1/artists", None),
+    ("GET", "/api/v1/shows", None),
+    ("GET", "/api/v1/venues/{venue_id}", None),
+    ("GET", "/api/v1/artists/{artist_id}", None),
+    ("GET", "/export/shows.ndjson", None),
+]
+
+
+def engines():
+    """The primary and every replica engine routing may run a view on."""
+
+    return [db.engine] + [replica.engine for replica in app.extensions["replicas"].replicas]
+
+
+@contextmanager
+def recorded_statements(engines):
+    """Collects (statement, parameters, server_side) for every SELECT run on
+    `engines` inside the block."""
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            server_side = bool(context and context.execution_options.get("stream_results"))
+            statements.append((statement, parameters, server_side))
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+
+
+def _guarded(relation, relations):
+    # The monthly partitions of a guarded table (see partitions.py) count as
+    # the table itself.
+    return re.sub(r"_(p\d{4}_\d{2}|default)$", "", relation or "") in relations
+
+
+def seq_scans(plan, relations=GUARDED):
+    """Yields the relation names of Seq Scan nodes on `relations` (or their
+    partitions) in `plan`."""
+
+    if plan.get("Node Type") == "Seq Scan" and _guarded(plan.get("Relation Name"), relations):
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from seq_scans(child, relations)
+
+
+def explain(statement, parameters, server_side=False):
+    """Plans `statement` on the primary. Statements streamed through a
+    server-side cursor (the exports) are planned as that cursor, which
+    favours plans that return the first rows fast."""
+
+    if server_side:
+        statement = "DECLARE query_plans_check NO SCROLL CURSOR FOR " + statement
+    with db.engine.connect() as connection:
+        result = connection.exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + statement, parameters
+        )
+        return result.scalar()[0]["Plan"]
+
+
+def _sample_ids():
+    with app.app_context():
+        venue_id = db.session.query(Show.venue_id).limit(1).scalar()
+        artist_id = db.session.query(Show.artist_id).limit(1).scalar()
+        return {
+            "venue_id": venue_id or db.session.query(Venue.id).limit(1).scalar(),
+            "artist_id": artist_id or db.session.query(Artist.id).limit(1).scalar(),
+        }
+
+
+def check(save_dir=None, report=print):
+    """Returns a list of (route, relation, statement) for every seq scan found."""
+
+    if db.engine.dialect.name != "postgresql":
+        raise RuntimeError("Query plan checks need a PostgreSQL database.")
+
+    with app.app_context():
+        shows = db.session.query(Show.id).count()
+        archived = db.session.query(ShowArchive.id).count()
+    if shows < MIN_SHOWS:
+        report(f"warning: only {shows} shows; plans may not reflect production")
+    guarded = GUARDED
+    if archived >= MIN_ARCHIVED_SHOWS:
+        guarded += ("ShowArchive",)
+    else:
+        report(f"note: only {archived} archived shows; ShowArchive scans not checked")
+
+    ids = _sample_ids()
+    client = app.test_client()
+    failures = []
+    for method, route, form in ROUTES:
+        url = route.format(**ids)
+        detail_cache.clear()
+        with recorded_statements(engines()) as statements:
+            # buffered: streamed responses run their queries while read.
+            response = client.open(url, method=method, data=form, buffered=True)
+        if response.status_code >= 400:
+            failures.append((url, None, f"HTTP {response.status_code}"))
+            continue
+        if not statements:
+            failures.append((url, None, "no statements recorded"))
+            continue
+
+        plans = []
+        for statement, parameters, server_side in statements:
+            plan = explain(statement, parameters, server_side)
+            plans.append({"statement": statement, "plan": plan})
+            for relation in seq_scans(plan, guarded):
+                failures.append((url, relation, statement))
+        report(f"{method} {url}: {len(statements)} queries checked")
+
+        if save_dir:
+            os.makedirs(save_dir, exist_ok=True)
+            name = re.sub(r"\W+", "_", f"{method}{route}").strip("_")
+            with open(os.path.join(save_dir, f"{name}.json"), "w") as f:
+                json.dump(plans, f, indent=2, default=str)
+
+    return failures
@@ -0,0 +1,137 @@
+"""Per-request SQL instrumentation, N+1 detection and Server-Timing headers.
+
+Engine events count every statement a request executes (on the primary and
+on replicas) and time it; the statement's shape, with parameters and IN
+lists collapsed, is counted too, and a shape repeated SQL_N_PLUS_ONE_THRESHOLD
+times or more in one request is logged as a suspected N+1. Template rendering
+is timed by the Template class. Each response gets a header like
+
+    Server-Timing: db;dur=3.1;desc="4 queries", tpl;dur=5.7, app;dur=1.2
+
+where app is the rest of the request's wall time. The cost is two
+perf_counter() calls and a dict update per statement, so it is left on by
+default (SQL_INSTRUMENTATION).
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from functools import lru_cache
+
+from flask import g, has_request_context, request
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = r"(?:%\(\w+\)s|%s|\?|:\w+|\$\d+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement):
+    """Returns `statement` with IN lists, numbers and whitespace collapsed, so
+    the same query with different parameters has the same shape."""
+
+    shape = _PLACEHOLDER_LIST.sub("(?)", statement)
+    shape = _NUMBER.sub("N", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class RequestStats:
+    __slots__ = ("started", "queries", "db_seconds", "template_seconds",
+                 "shapes", "_template_depth")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.shapes = Counter()
+        self._template_depth = 0
+
+    def repeated(self, threshold):
+        return [(shape, n) for shape, n in self.shapes.items() if n >= threshold]
+
+    def server_timing(self):
+        total = time.perf_counter() - self.started
+        app_seconds = max(0.0, total - self.db_seconds - self.template_seconds)
+        return (
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries", '
+            f"tpl;dur={self.template_seconds * 1000:.1f}, "
+            f"app;dur={app_seconds * 1000:.1f}"
+        )
+
+
+def current():
+    """Returns the RequestStats of the current request, or None."""
+
+    if has_request_context():
+        return g.get("request_stats")
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current()
+    if stats is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current()
+    if stats is None:
+        return
+    started = conn.info.get("query_started")
+    if started:
+        stats.db_seconds += time.perf_counter() - started.pop()
+    stats.queries += 1
+    stats.shapes[statement_shape(statement)] += 1
+
+
+class TimedTemplate(Template):
+    """Adds render time to the current request's stats; nested renders (a
+    fragment rendered while rendering a page) are counted once."""
+
+    def render(self, *args, **kwargs):
+        stats = current()
+        if stats is None:
+            return super().render(*args, **kwargs)
+        stats._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            stats._template_depth -= 1
+            if not stats._template_depth:
+                stats.template_seconds += time.perf_counter() - started
+
+
+def init_app(app):
+    if not app.config["SQL_INSTRUMENTATION"]:
+        return
+    threshold = app.config["SQL_N_PLUS_ONE_THRESHOLD"]
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    app.jinja_env.template_class = TimedTemplate
+
+    @app.before_request
+    def start_request_stats():
+        g.request_stats = RequestStats()
+
+    @app.after_request
+    def add_server_timing(response):
+        stats = g.get("request_stats")
+        if stats is None:
+            return response
+        response.headers["Server-Timing"] = stats.server_timing()
+        for shape, count in stats.repeated(threshold):
+            logger.warning(
+                f"Possible N+1 in {request.method} {request.path} "
+                f"({request.endpoint}): {count}x {shape[:300]}"
+            )
+        return response
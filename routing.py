@@ -0,0 +1,145 @@
+"""Read-replica routing for the Flask-SQLAlchemy session.
+
+Views decorated with read_only() run their queries on one of the engines in
+DATABASE_REPLICA_URLS, picked round-robin per request and skipped while
+failing their health check. Everything else, every flush, and every request
+from a client that committed a write in the last REPLICA_STICKY_SECONDS
+(read-your-writes, e.g. the redirect after an edit) uses the primary.
+
+With no replicas configured every request goes to the primary. Two local
+databases can stand in for primary and replica:
+
+    DATABASE_URL=postgresql://.../fyyur \
+    DATABASE_REPLICA_URLS=postgresql://.../fyyur_replica flask run
+"""
+
+import logging
+import threading
+import time
+
+from flask import g, has_app_context, request, session
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import create_engine, event, orm
+
+import db_pool
+
+logger = logging.getLogger(__name__)
+
+
+def read_only(view):
+    """Marks a view function as safe to serve from a replica."""
+
+    view.read_only = True
+    return view
+
+
+class Replica:
+    def __init__(self, url, engine):
+        self.url = url
+        self.engine = engine
+        self.checked_at = 0.0
+        self.down_until = 0.0
+
+
+class ReplicaSet:
+    """Round-robin over replica engines with a periodic SELECT 1 check."""
+
+    def __init__(self, replicas, health_interval=10, retry_after=30):
+        self.replicas = replicas
+        self.health_interval = health_interval
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def _healthy(self, replica):
+        now = time.monotonic()
+        if replica.down_until > now:
+            return False
+        if now - replica.checked_at < self.health_interval:
+            return True
+        replica.checked_at = now
+        try:
+            with replica.engine.connect() as connection:
+                connection.exec_driver_sql("SELECT 1")
+        except Exception as e:
+            replica.down_until = now + self.retry_after
+            logger.error(f"Replica {replica.engine.url!r} failed its health check")
+            logger.error(e)
+            return False
+        return True
+
+    def pick(self):
+        """Returns the next healthy replica engine, or None."""
+
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = self.replicas[self._next % len(self.replicas)]
+                self._next += 1
+            if self._healthy(replica):
+                return replica.engine
+        return None
+
+    def status(self):
+        now = time.monotonic()
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "up": replica.down_until <= now,
+                "pool": db_pool.pool_status(replica.engine),
+            }
+            for replica in self.replicas
+        ]
+
+
+class RoutingSession(SignallingSession):
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not self._flushing and has_app_context():
+            engine = g.get("replica_engine")
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write(db_session):
+    if has_app_context():
+        g.wrote_to_primary = True
+
+
+def init_app(app, db):
+    config = app.config
+    replicas = []
+    for url in filter(None, (u.strip() for u in config["DATABASE_REPLICA_URLS"].split(","))):
+        options = db_pool.engine_options(dict(config, SQLALCHEMY_DATABASE_URI=url))
+        engine = create_engine(url, **options)
+        db_pool.configure_engine(engine, config)
+        replicas.append(Replica(url, engine))
+
+    replica_set = ReplicaSet(
+        replicas,
+        health_interval=config["REPLICA_HEALTH_INTERVAL"],
+        retry_after=config["REPLICA_RETRY_SECONDS"],
+    )
+    app.extensions["replicas"] = replica_set
+    if not replicas:
+        return
+
+    @app.before_request
+    def route_to_replica():
+        view = app.view_functions.get(request.endpoint)
+        if not getattr(view, "read_only", False):
+            return
+        if session.get("primary_until", 0) > time.time():
+            return
+        g.replica_engine = replica_set.pick()
+
+    @app.after_request
+    def stick_to_primary(response):
+        if g.get("wrote_to_primary"):
+            session["primary_until"] = time.time() + config["REPLICA_STICKY_SECONDS"]
+        return response
@@ -0,0 +1,193 @@
+"""Ranked name/city/genre search for the venue and artist search routes.
+
+On PostgreSQL the lookups are served by the generated ``search_vector``
+tsvector column and the pg_trgm GIN indexes added in migration
+70e0df45cee7, so a leading-wildcard substring match no longer means a
+sequential scan. Other backends fall back to plain ILIKE matching.
+
+With SEARCH_INDEX set to "memory", name lookups are answered from an
+in-process trigram index instead and the database is only asked for the
+matching ids. Each worker builds its own index, so before answering it
+catches up on the rows whose updated_at moved since it last looked (one
+indexed query), which picks up names written by other workers and by
+``flask import``.
+"""
+
+from datetime import timedelta
+
+from sqlalchemy import func, literal_column, select, union
+
+from app import app, db
+from models import Artist, Genre, Venue, artist_genre, venue_genre
+from ngram_index import NGramIndex
+
+venue_names = NGramIndex()
+artist_names = NGramIndex()
+INDEXED = {"venues": (Venue, venue_names), "artists": (Artist, artist_names)}
+
+# Catching up re-reads rows this far behind the newest updated_at seen, for
+# writes that committed late, replica lag and clock differences between
+# workers; re-indexing a name is idempotent.
+CATCH_UP_MARGIN = timedelta(seconds=60)
+
+
+def memory_index_enabled():
+    return app.config["SEARCH_INDEX"] == "memory"
+
+
+def build_indexes():
+    """Loads every venue and artist name into the in-process indexes."""
+
+    for model, index in INDEXED.values():
+        # Read the stamp first: rows changed while loading are caught up later.
+        index.last_seen = db.session.query(func.max(model.updated_at)).scalar()
+        index.build(db.session.query(model.id, model.name).yield_per(1000))
+
+
+def changes(kind):
+    """Statement for the `kind` rows created or edited since the memory index
+    last caught up, or None when that index is not in use."""
+
+    model, index = INDEXED[kind]
+    if not (memory_index_enabled() and index.ready):
+        return None
+    query = select(model.id, model.name, model.updated_at)
+    if index.last_seen is not None:
+        query = query.where(model.updated_at >= index.last_seen - CATCH_UP_MARGIN)
+    return query
+
+
+def catch_up(kind, rows):
+    """Applies the rows fetched by changes(kind) to the memory index."""
+
+    index = INDEXED[kind][1]
+    for id_, name, updated_at in rows:
+        index.add(id_, name)
+        if index.last_seen is None or updated_at > index.last_seen:
+            index.last_seen = updated_at
+
+
+def _escape_like(term):
+    return term.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def _upcoming_counts(model):
+    return select(
+        model.id,
+        model.name,
+        model.upcoming_shows_count.label("num_upcoming_shows"),
+    )
+
+
+class SearchPlan:
+    """A search statement plus, for the in-memory index, the ranked ids it
+    fetches and the total match count (otherwise read from the rows)."""
+
+    def __init__(self, statement, ids=None, total=None):
+        self.statement = statement
+        self.ids = ids
+        self.total = total
+
+    def results(self, rows):
+        """Returns (rows, total) for the rows fetched by self.statement."""
+
+        if self.ids is None:
+            return rows, rows[0].total if rows else 0
+        position = {id_: i for i, id_ in enumerate(self.ids)}
+        rows = sorted(rows, key=lambda row: position[row.id])
+        return rows, self.total
+
+
+def _plan_indexed(model, index, term):
+    ids = index.search(term)
+    page = ids[: app.config["SEARCH_MAX_RESULTS"]]
+    if not page:
+        return SearchPlan(None, [], len(ids))
+    return SearchPlan(_upcoming_counts(model).where(model.id.in_(page)), page, len(ids))
+
+
+def _candidates(model, genre_table, genre_fk, term, pattern):
+    """Ids matching any search predicate, each collected by its own branch.
+
+    ORing the predicates in one WHERE (with a correlated genre EXISTS) keeps
+    PostgreSQL from combining the indexes and turns the search into a
+    sequential scan; as a UNION every branch uses its own index (tsvector,
+    name and city trigram, Genre name trigram plus the association primary
+    key).
+    """
+
+    branches = [
+        select(model.id).where(model.name.ilike(pattern, escape="!")),
+        select(model.id).where(model.city.ilike(pattern, escape="!")),
+        select(genre_fk).where(
+            genre_table.c.genre_id.in_(
+                select(Genre.id).where(Genre.name.ilike(pattern, escape="!"))
+            )
+        ),
+    ]
+    if db.engine.dialect.name == "postgresql":
+        vector = literal_column(f'"{model.__tablename__}".search_vector')
+        branches.append(
+            select(model.id).where(vector.op("@@")(func.plainto_tsquery("simple", term)))
+        )
+    return union(*branches)
+
+
+def _plan(model, genre_table, genre_fk, term):
+    """Ranks rows of (id, name, num_upcoming_shows, total), best first."""
+
+    pattern = f"%{_escape_like(term)}%"
+
+    query = _upcoming_counts(model).add_columns(
+        func.count().over().label("total")
+    )
+
+    if db.engine.dialect.name == "postgresql":
+        vector = literal_column(f'"{model.__tablename__}".search_vector')
+        tsquery = func.plainto_tsquery("simple", term)
+        order = [
+            (func.ts_rank(vector, tsquery) + func.similarity(model.name, term)).desc(),
+            model.name,
+        ]
+    else:
+        order = [model.name]
+
+    return SearchPlan(
+        query.where(model.id.in_(_candidates(model, genre_table, genre_fk, term, pattern)))
+        .order_by(*order, model.id)
+        .limit(app.config["SEARCH_MAX_RESULTS"])
+    )
+
+
+def plan_venues(term):
+    if memory_index_enabled() and venue_names.ready:
+        return _plan_indexed(Venue, venue_names, term)
+    return _plan(Venue, venue_genre, venue_genre.c.venue_id, term)
+
+
+def plan_artists(term):
+    if memory_index_enabled() and artist_names.ready:
+        return _plan_indexed(Artist, artist_names, term)
+    return _plan(Artist, artist_genre, artist_genre.c.artist_id, term)
+
+
+def _run(plan):
+    if plan.statement is None:
+        return plan.results([])
+    return plan.results(db.session.execute(plan.statement).all())
+
+
+def _catch_up(kind):
+    statement = changes(kind)
+    if statement is not None:
+        catch_up(kind, db.session.execute(statement).all())
+
+
+def find_venues(term):
+    _catch_up("venues")
+    return _run(plan_venues(term))
+
+
+def find_artists(term):
+    _catch_up("artists")
+    return _run(plan_artists(term))
@@ -0,0 +1,109 @@
+"""Precompiled Jinja bytecode and template warm-up for worker startup.
+
+``flask compile-templates`` compiles every template under templates/ into
+TEMPLATE_CACHE_DIR as part of the build. Workers then load the compiled
+bytecode instead of parsing and compiling each template on its first
+render. A template whose source no longer matches its bytecode is still
+compiled in memory. Workers only read the cache, so they never race each
+other writing it and work on a read-only filesystem.
+
+Cache entries are keyed by template name and absolute path, so build the
+cache in the directory the app is served from. It is also tied to the
+Python version that built it.
+
+With TEMPLATE_WARMUP set, warm_up() runs at import (outside the flask CLI).
+It loads every template and requests WARMUP_URLS once through the test
+client. This renders the pages and forms before the first real request,
+and also primes babel's locale data and SQLAlchemy's statement cache. The
+database connections it opens are closed again afterwards, so workers
+forked from a preloaded app never share them. The warm-up requests show up
+in the metrics like any other request.
+"""
+
+import logging
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+logger = logging.getLogger(__name__)
+
+WARMUP_URLS = [
+    "/",
+    "/venues",
+    "/artists",
+    "/shows",
+    "/venues/create",
+    "/artists/create",
+    "/shows/create",
+]
+
+
+class ReadOnlyBytecodeCache(FileSystemBytecodeCache):
+    """Loads bytecode written by compile_all() and never writes any."""
+
+    def dump_bytecode(self, bucket):
+        pass
+
+
+def template_names(app):
+    return sorted(
+        name for name in app.jinja_env.list_templates() if name.endswith(".html")
+    )
+
+
+def compile_all(app, directory):
+    """Compiles every template into a fresh bytecode cache in `directory`.
+    Returns the names compiled."""
+
+    os.makedirs(directory, exist_ok=True)
+    cache = FileSystemBytecodeCache(directory)
+    cache.clear()
+
+    env = app.jinja_env
+    previous = env.bytecode_cache
+    env.bytecode_cache = cache
+    env.cache.clear()
+    try:
+        names = template_names(app)
+        for name in names:
+            env.get_template(name)
+    finally:
+        env.bytecode_cache = previous
+        env.cache.clear()
+    return names
+
+
+def warm_up(app):
+    """Loads every template and renders the pages behind WARMUP_URLS once."""
+
+    for name in template_names(app):
+        app.jinja_env.get_template(name)
+
+    client = app.test_client()
+    try:
+        for url in WARMUP_URLS:
+            try:
+                status = client.get(url).status_code
+            except Exception:
+                logger.warning("Warm-up request to %s failed", url, exc_info=True)
+                continue
+            if status >= 500:
+                logger.warning("Warm-up request to %s returned %s", url, status)
+    finally:
+        _dispose_engines(app)
+
+
+def _dispose_engines(app):
+    """Closes the pooled connections the warm-up opened. A preloading server
+    (gunicorn --preload) forks its workers from this process, and a forked
+    worker must never reuse its parent's sockets."""
+
+    app.extensions["sqlalchemy"].db.get_engine(app).dispose()
+    for replica in app.extensions["replicas"].replicas:
+        replica.engine.dispose()
+
+
+def init_app(app):
+    directory = app.config["TEMPLATE_CACHE_DIR"]
+    if directory:
+        app.jinja_env.bytecode_cache = ReadOnlyBytecodeCache(directory)
@@ -0,0 +1,3 @@
+# The app's modules import app.py back, so it has to be imported first, as
+# the entry points (app.py itself, asgi.py) do.
+import app  # noqa: F401
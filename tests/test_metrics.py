@@ -0,0 +1,26 @@
+from metrics import Histogram, Registry
+
+
+def test_histogram_samples_are_cumulative():
+    histogram = Histogram(Registry(), "latency_seconds", "Latency.", ["endpoint"], buckets=(0.25, 1))
+    for value in (0.125, 0.25, 0.5, 3):
+        histogram.observe(value, endpoint="index")
+
+    samples = list(histogram.samples(histogram.dump()))
+    assert samples == [
+        ("latency_seconds_bucket", [("endpoint", "index"), ("le", "0.25")], 2),
+        ("latency_seconds_bucket", [("endpoint", "index"), ("le", "1")], 3),
+        ("latency_seconds_bucket", [("endpoint", "index"), ("le", "+Inf")], 4),
+        ("latency_seconds_count", [("endpoint", "index")], 4),
+        ("latency_seconds_sum", [("endpoint", "index")], 3.875),
+    ]
+
+
+def test_histogram_keeps_label_sets_apart():
+    histogram = Histogram(Registry(), "db_seconds", "DB time.", ["endpoint"], buckets=(1,))
+    histogram.observe(0.5, endpoint="a")
+    histogram.observe(2, endpoint="b")
+    assert dict((tuple(key), value) for key, value in histogram.dump()) == {
+        ("a",): [1, 0, 0.5],
+        ("b",): [0, 1, 2],
+    }
@@ -0,0 +1,29 @@
+from ngram_index import NGramIndex
+
+
+def _index():
+    index = NGramIndex()
+    index.build([(1, "The Musical Hop"), (2, "Park Square Live Music & Coffee"), (3, None)])
+    return index
+
+
+def test_search_is_case_insensitive_and_ordered_by_name():
+    index = _index()
+    assert index.search("MUSIC") == [2, 1]
+    assert index.search("hop") == [1]
+    assert index.search("jazz") == []
+
+
+def test_short_terms_scan_every_name():
+    assert _index().search("p") == [2, 1]
+    assert _index().search("") == [3, 2, 1]
+
+
+def test_add_replaces_and_remove_drops():
+    index = _index()
+    index.add(1, "The Dueling Pianos Bar")
+    assert index.search("music") == [2]
+    assert index.search("piano") == [1]
+    index.remove(2)
+    assert index.search("music") == []
+    assert len(index) == 2
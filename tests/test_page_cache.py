@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+from page_cache import FragmentCache
+
+
+def test_get_returns_what_set_stored_under_the_same_stamp():
+    cache = FragmentCache()
+    key = ("venue", 1)
+    cache.set(key, cache.version(key), "page", stamp=(1, "a"))
+    assert cache.get(key, (1, "a")) == "page"
+
+
+def test_stamp_mismatch_drops_the_entry():
+    cache = FragmentCache()
+    key = ("venue", 1)
+    cache.set(key, cache.version(key), "page", stamp=(1, "a"))
+    assert cache.get(key, (2, "b")) is None
+    assert cache.get(key, (1, "a")) is None
+
+
+def test_expired_entries_are_dropped():
+    cache = FragmentCache()
+    key = ("artist", 1)
+    cache.set(key, cache.version(key), "page", expires_at=datetime.now() - timedelta(seconds=1))
+    assert cache.get(key) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = FragmentCache(maxsize=2)
+    for id_ in (1, 2):
+        cache.set(("venue", id_), 0, id_)
+    cache.get(("venue", 1))
+    cache.set(("venue", 3), 0, 3)
+    assert cache.get(("venue", 2)) is None
+    assert cache.get(("venue", 1)) == 1
+    assert cache.get(("venue", 3)) == 3
+
+
+def test_render_racing_with_invalidate_is_not_stored():
+    cache = FragmentCache()
+    key = ("venue", 1)
+    version = cache.version(key)
+    cache.invalidate(key)
+    cache.set(key, version, "stale")
+    assert cache.get(key) is None
+    cache.set(key, cache.version(key), "fresh")
+    assert cache.get(key) == "fresh"
+
+
+def test_versions_stay_bounded_and_keep_rejecting_stale_renders():
+    cache = FragmentCache(maxsize=2)
+    key = ("venue", 1)
+    version = cache.version(key)
+    cache.invalidate(key)
+    for id_ in range(2, 10):
+        cache.invalidate(("venue", id_))
+    assert len(cache._versions) == 2
+    cache.set(key, version, "stale")
+    assert cache.get(key) is None
+
+
+def test_clear_drops_entries_and_pending_renders():
+    cache = FragmentCache()
+    key = ("artist", 1)
+    cache.set(key, cache.version(key), "page")
+    version = cache.version(key)
+    cache.clear()
+    assert cache.get(key) is None
+    cache.set(key, version, "stale")
+    assert cache.get(key) is None
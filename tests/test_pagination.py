@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, select
+
+from pagination import decode_cursor, encode_cursor, paginate
+
+metadata = MetaData()
+items = Table(
+    "items",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String),
+    Column("start_time", DateTime),
+)
+KEYS = [items.c.name, items.c.id]
+
+
+def _token(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    columns = [items.c.start_time, items.c.id]
+    values = [datetime(2026, 10, 18, 20, 30), 7]
+    assert decode_cursor(encode_cursor("p", values), columns) == ("p", values)
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "not base64!",
+        _token(["x", ["a", 1]]),
+        _token(["n", ["a"]]),
+        _token(["n", "a"]),
+        _token(["n", ["x", "abc"]]),
+        _token(["n", ["x", True]]),
+        _token(["n", [1, 2]]),
+    ],
+)
+def test_malformed_cursors_raise_value_error(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token, KEYS)
+
+
+def test_bad_datetime_raises_value_error():
+    with pytest.raises(ValueError):
+        decode_cursor(_token(["n", ["yesterday", 1]]), [items.c.start_time, items.c.id])
+
+
+@pytest.fixture
+def execute():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            items.insert(),
+            [{"id": i, "name": f"name {i % 4}", "start_time": None} for i in range(1, 12)],
+        )
+    with engine.connect() as connection:
+        yield connection.execute
+
+
+def test_pages_forward_and_back(execute):
+    query = select(items.c.id, items.c.name)
+    expected = [row.id for row in execute(query.order_by(*KEYS)).all()]
+
+    pages, cursor = [], None
+    while True:
+        page = paginate(query, KEYS, cursor=cursor, per_page=3, execute=execute)
+        pages.append([row.id for row in page.items])
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    assert sum(pages, []) == expected
+    assert not paginate(query, KEYS, per_page=3, execute=execute).has_prev
+
+    back = [pages[-1]]
+    while page.has_prev:
+        page = paginate(query, KEYS, cursor=page.prev_cursor, per_page=3, execute=execute)
+        back.insert(0, [row.id for row in page.items])
+    assert back == pages
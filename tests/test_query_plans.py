@@ -0,0 +1,34 @@
+"""Runs the query plan check (query_plans.py) over every route in ROUTES.
+
+Needs DATABASE_URL to point at a migrated and seeded PostgreSQL database
+(benchmarks/seed.py); skipped otherwise.
+"""
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import db
+import query_plans
+
+
+def _postgresql_available():
+    if db.engine.dialect.name != "postgresql":
+        return False
+    try:
+        db.engine.connect().close()
+    except OperationalError:
+        return False
+    return True
+
+
+pytestmark = pytest.mark.skipif(
+    not _postgresql_available(),
+    reason="query plan checks need a reachable PostgreSQL database",
+)
+
+
+def test_routes_avoid_seq_scans_of_guarded_tables():
+    failures = query_plans.check(report=lambda message: None)
+    assert not failures, "\n".join(
+        f"{route}: {relation or statement}" for route, relation, statement in failures
+    )
@@ -0,0 +1,27 @@
+from collections import namedtuple
+from datetime import datetime
+
+from app import split_shows
+
+Row = namedtuple("Row", "start_time")
+NOW = datetime(2026, 10, 18, 20, 0)
+
+
+def _rows(*hours):
+    return [Row(datetime(2026, 10, 18, hour, 0)) for hour in hours]
+
+
+def test_splits_at_now():
+    past, upcoming = split_shows(_rows(18, 19, 21, 22), NOW)
+    assert past == _rows(18, 19)
+    assert upcoming == _rows(21, 22)
+
+
+def test_show_starting_now_is_past():
+    assert split_shows(_rows(20), NOW) == (_rows(20), [])
+
+
+def test_all_past_or_all_upcoming():
+    assert split_shows(_rows(18, 19), NOW) == (_rows(18, 19), [])
+    assert split_shows(_rows(21), NOW) == ([], _rows(21))
+    assert split_shows([], NOW) == ([], [])